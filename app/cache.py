@@ -0,0 +1,148 @@
+"""
+In-process response cache for the news routes.
+
+Entries are evicted least-recently-used first once the cache is full and expire
+after a TTL. Each entry can carry tags so that a group of entries can be
+invalidated at once, e.g. every response at the newest edge of a category when
+new articles for that category are ingested.
+"""
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+from pymongo.errors import OperationFailure
+
+from .mongo import AsyncMongoClient
+from .config import MongoConfig, CacheConfig
+
+# Tag of the responses that change when an article is added to a category
+ALL_CATEGORIES = "*"
+
+class ResponseCache:
+    """Bounded LRU cache with a TTL and tag-based invalidation."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = ()) -> None:
+        """Cache a value under the given tags, evicting the least recently used entry if full."""
+        if key in self._entries:
+            self._remove(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Remove every entry carrying a tag. Returns the number of entries removed."""
+        keys = self._tags.pop(tag, set())
+        for key in keys:
+            self._remove(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._entries.clear()
+        self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss, eviction, expiration and invalidation counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+news_cache = ResponseCache(CacheConfig.NEWS_CACHE_MAX_ENTRIES, CacheConfig.NEWS_CACHE_TTL)
+# The category statistics, looked up by every navigation request; kept apart so that
+# the counters of news_cache only count responses
+stats_cache = ResponseCache(1, CacheConfig.NEWS_CACHE_TTL)
+
+def newest_edge_tag(category: Optional[str]) -> tuple:
+    """Tag of the cached responses at the newest edge of a category (or of all news)."""
+    return ("newest_edge", category or ALL_CATEGORIES)
+
+def invalidate_news_categories(categories: Iterable[Optional[str]]) -> int:
+    """
+    Invalidate the cached responses that new articles in these categories change:
+    the newest edge of each category and of the unfiltered view, and the category
+    statistics.
+    """
+    stats_cache.invalidate_tag(newest_edge_tag(None))
+    removed = news_cache.invalidate_tag(newest_edge_tag(None))
+    for category in set(categories):
+        if category:
+            removed += news_cache.invalidate_tag(newest_edge_tag(category))
+    return removed
+
+async def watch_news_inserts(retry_delay: float = 30.0) -> None:
+    """
+    Invalidate the news cache whenever articles are inserted by another process
+    (e.g. the ingest script). Runs until cancelled. Change streams need a replica
+    set; on a standalone server the cache relies on its TTL alone.
+    """
+    pipeline = [
+        {"$match": {"operationType": "insert"}},
+        {"$project": {"fullDocument.category": 1}},
+    ]
+    while True:
+        try:
+            async with AsyncMongoClient.watch(
+                MongoConfig.NEWS_DATABASE, MongoConfig.NEWS_COLLECTION, pipeline
+            ) as stream:
+                async for change in stream:
+                    invalidate_news_categories([change.get("fullDocument", {}).get("category")])
+        except asyncio.CancelledError:
+            raise
+        except OperationFailure as e:
+            print(f"News cache change stream unavailable, relying on the TTL: {str(e)}")
+            return
+        except Exception as e:
+            print(f"News cache change stream error, retrying in {retry_delay}s: {str(e)}")
+            await asyncio.sleep(retry_delay)
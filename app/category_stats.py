@@ -0,0 +1,167 @@
+"""
+Materialized per-category statistics of the news collection.
+
+One document per category (and one for all the news, under ALL_CATEGORIES) holds the
+number of articles, the newest and oldest article IDs and the time of the last ingest.
+The ingest path updates them incrementally with each bulk insert (see
+NewsWriteBuffer), so the routes can list the categories and answer the navigation
+edge checks without querying the news collection. rebuild_category_stats() recomputes
+them from scratch, e.g. after articles were deleted (python -m app.migrations
+category_stats).
+"""
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import DeleteMany, ReplaceOne, UpdateOne
+
+from .mongo import AsyncMongoClient
+from .config import MongoConfig
+from .cache import ALL_CATEGORIES, stats_cache, newest_edge_tag, invalidate_news_categories
+
+CATEGORY_STATS_CACHE_KEY = ("category_stats",)
+
+def _utcnow() -> datetime:
+    """Datetimes are stored as naive UTC."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def category_stats_updates(documents: Iterable[Dict[str, Any]], ingested_at: Optional[datetime] = None) -> List[UpdateOne]:
+    """
+    The upserts that add inserted news documents to the statistics of their category
+    and to the totals.
+
+    Args:
+        documents: Inserted news documents, with their '_id'
+        ingested_at: Time of the insert, now if None
+
+    Returns:
+        One update per category touched, plus one for the totals
+    """
+    ingested_at = ingested_at or _utcnow()
+    groups = defaultdict(list)
+    for document in documents:
+        groups[ALL_CATEGORIES].append(document["_id"])
+        if document.get("category"):
+            groups[document["category"]].append(document["_id"])
+    return [
+        UpdateOne(
+            {"_id": category},
+            {
+                "$inc": {"count": len(ids)},
+                "$max": {"newest_id": max(ids), "last_ingest_at": ingested_at},
+                "$min": {"oldest_id": min(ids)},
+            },
+            upsert=True
+        )
+        for category, ids in groups.items()
+    ]
+
+async def record_inserted(documents: List[Dict[str, Any]]) -> None:
+    """
+    Add inserted news documents to the category statistics. The caller invalidates the
+    cached statistics afterwards, with the rest of the newest edge of the news.
+    """
+    if not documents:
+        return
+    summary = await AsyncMongoClient.bulk_write(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.CATEGORY_STATS_COLLECTION,
+        category_stats_updates(documents),
+        ordered=False
+    )
+    for error in summary["errors"]:
+        print(f"Error updating the category statistics: {error['message']}")
+
+async def rebuild_category_stats() -> int:
+    """
+    Recompute the category statistics from the news collection.
+
+    Articles inserted while the rebuild runs may be counted twice or not at all; run
+    it again once ingestion is idle if the counts must be exact.
+
+    Returns:
+        Number of statistics documents written, the categories' and the totals
+    """
+    groups = await AsyncMongoClient.aggregate(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        [{"$group": {
+            "_id": "$category",
+            "count": {"$sum": 1},
+            "newest_id": {"$max": "$_id"},
+            "oldest_id": {"$min": "$_id"},
+        }}]
+    )
+    # aggregate() returns the group key as a string under 'id', "None" for articles without a category
+    stats = {group["id"]: group for group in groups if group["id"] != "None"}
+    if groups:
+        stats[ALL_CATEGORIES] = {
+            "count": sum(group["count"] for group in groups),
+            "newest_id": max(group["newest_id"] for group in groups),
+            "oldest_id": min(group["oldest_id"] for group in groups),
+        }
+
+    operations = [
+        ReplaceOne(
+            {"_id": category},
+            {
+                "count": group["count"],
+                "newest_id": group["newest_id"],
+                "oldest_id": group["oldest_id"],
+                # The newest article was created right before it was ingested
+                "last_ingest_at": group["newest_id"].generation_time.replace(tzinfo=None),
+            },
+            upsert=True
+        )
+        for category, group in stats.items()
+    ]
+    operations.append(DeleteMany({"_id": {"$nin": list(stats)}}))
+    summary = await AsyncMongoClient.bulk_write(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.CATEGORY_STATS_COLLECTION,
+        operations,
+        ordered=True
+    )
+    for error in summary["errors"]:
+        print(f"Error rebuilding the category statistics: {error['message']}")
+    invalidate_news_categories([])
+    return len(stats)
+
+async def ensure_category_stats() -> None:
+    """Build the category statistics if they were never built, before they are updated incrementally."""
+    totals = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.CATEGORY_STATS_COLLECTION,
+        {"_id": ALL_CATEGORIES},
+        limit=1
+    )
+    if not totals:
+        await rebuild_category_stats()
+
+async def get_category_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    The statistics of every category, and the totals under ALL_CATEGORIES.
+
+    Cached apart from the responses (see stats_cache) and refreshed whenever articles
+    are ingested, like the responses at the newest edge of the news.
+
+    Returns:
+        Dict mapping each category to its 'count', 'newest_id', 'oldest_id' and
+        'last_ingest_at', empty if the statistics were never built
+    """
+    cached = stats_cache.get(CATEGORY_STATS_CACHE_KEY)
+    if cached is not None:
+        return cached
+    documents = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.CATEGORY_STATS_COLLECTION,
+        {},
+        limit=0
+    )
+    stats = {document.pop("_id"): document for document in documents}
+    stats_cache.set(CATEGORY_STATS_CACHE_KEY, stats, tags=[newest_edge_tag(None)])
+    return stats
+
+async def get_category_boundaries(category: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The statistics of a category (or of all the news), None if there are none."""
+    return (await get_category_stats()).get(category or ALL_CATEGORIES)
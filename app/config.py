@@ -9,6 +9,127 @@ class MongoConfig:
     MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
     NEWS_DATABASE = os.getenv("MONGODB_DB_NAME", "news_manager")
     NEWS_COLLECTION = os.getenv("MONGODB_COLLECTION", "news")
+    FEED_STATE_COLLECTION = os.getenv("MONGODB_FEED_STATE_COLLECTION", "feed_state")
+    JOBS_COLLECTION = os.getenv("MONGODB_JOBS_COLLECTION", "ingest_jobs")
+    CATEGORY_STATS_COLLECTION = os.getenv("MONGODB_CATEGORY_STATS_COLLECTION", "category_stats")
+    # Maximum number of write operations sent to MongoDB in one round-trip
+    BULK_BATCH_SIZE = int(os.getenv("MONGODB_BULK_BATCH_SIZE", "500"))
+    # Connection pool of the asyncio client used by the API and the ingest pipeline
+    ASYNC_MAX_POOL_SIZE = int(os.getenv("MONGODB_ASYNC_MAX_POOL_SIZE", "100"))
+    ASYNC_MIN_POOL_SIZE = int(os.getenv("MONGODB_ASYNC_MIN_POOL_SIZE", "0"))
+
+class IngestConfig:
+    # Number of enriched articles buffered before they are written in one bulk insert
+    WRITE_BUFFER_SIZE = int(os.getenv("INGEST_WRITE_BUFFER_SIZE", "20"))
+    # Seconds allowed for updating all the channels together, and for a single channel
+    # (a channel can override it with 'update_budget' in news_config.NEWS_CHANNELS)
+    UPDATE_DEADLINE = float(os.getenv("INGEST_UPDATE_DEADLINE", "1800"))
+    CHANNEL_BUDGET = float(os.getenv("INGEST_CHANNEL_BUDGET", "900"))
+    # Near-duplicate detection: SimHash bands, maximum Hamming distance (must be below the
+    # number of bands), minimum words of title + description, and days between publications
+    NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() == "true"
+    NEAR_DUP_BANDS = int(os.getenv("NEAR_DUP_BANDS", "4"))
+    NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "3"))
+    NEAR_DUP_MIN_WORDS = int(os.getenv("NEAR_DUP_MIN_WORDS", "6"))
+    NEAR_DUP_WINDOW_DAYS = float(os.getenv("NEAR_DUP_WINDOW_DAYS", "3"))
+    # Related articles: neighbors kept per article, their minimum cosine similarity, and the
+    # dimension of the hashed TF-IDF vectors
+    RELATED_ENABLED = os.getenv("RELATED_ENABLED", "true").lower() == "true"
+    RELATED_TOP_K = int(os.getenv("RELATED_TOP_K", "10"))
+    RELATED_MIN_SCORE = float(os.getenv("RELATED_MIN_SCORE", "0.1"))
+    RELATED_FEATURES = int(os.getenv("RELATED_FEATURES", "2048"))
+    # Articles compared with each other: the most recent ones, up to this age and count
+    RELATED_WINDOW_DAYS = float(os.getenv("RELATED_WINDOW_DAYS", "30"))
+    RELATED_MAX_ARTICLES = int(os.getenv("RELATED_MAX_ARTICLES", "10000"))
+
+class FeedFetchConfig:
+    # Maximum number of RSS feeds fetched at the same time
+    MAX_CONCURRENCY = int(os.getenv("FEED_FETCH_MAX_CONCURRENCY", "10"))
+    # Maximum number of RSS feeds fetched at the same time from a single host
+    MAX_PER_HOST = int(os.getenv("FEED_FETCH_MAX_PER_HOST", "4"))
+    # Seconds allowed for a single feed before it is skipped for this run
+    FEED_TIMEOUT = float(os.getenv("FEED_FETCH_TIMEOUT", "20"))
+
+class SchedulerConfig:
+    # Seconds between two updates of a channel, adapted between MIN and MAX to how often it has new items
+    CHANNEL_MIN_INTERVAL = float(os.getenv("SCHEDULER_CHANNEL_MIN_INTERVAL", "120"))
+    CHANNEL_DEFAULT_INTERVAL = float(os.getenv("SCHEDULER_CHANNEL_DEFAULT_INTERVAL", "600"))
+    CHANNEL_MAX_INTERVAL = float(os.getenv("SCHEDULER_CHANNEL_MAX_INTERVAL", "3600"))
+    # Seconds between two fetches of a single RSS feed, adapted the same way
+    FEED_MIN_INTERVAL = float(os.getenv("SCHEDULER_FEED_MIN_INTERVAL", "120"))
+    FEED_DEFAULT_INTERVAL = float(os.getenv("SCHEDULER_FEED_DEFAULT_INTERVAL", "600"))
+    FEED_MAX_INTERVAL = float(os.getenv("SCHEDULER_FEED_MAX_INTERVAL", "21600"))
+    # Interval multipliers after a poll with new items (speed up) and without (back off)
+    SPEEDUP_FACTOR = float(os.getenv("SCHEDULER_SPEEDUP_FACTOR", "0.5"))
+    BACKOFF_FACTOR = float(os.getenv("SCHEDULER_BACKOFF_FACTOR", "1.5"))
+    # Random spread applied to every interval, as a fraction of it
+    JITTER = float(os.getenv("SCHEDULER_JITTER", "0.1"))
+    # Maximum number of channels updated at the same time
+    MAX_CONCURRENCY = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "2"))
+
+class HttpConfig:
+    # Total number of pooled connections shared by all channel fetchers
+    POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    # Number of pooled connections allowed to a single host
+    POOL_SIZE_PER_HOST = int(os.getenv("HTTP_POOL_SIZE_PER_HOST", "10"))
+    # Seconds an idle connection is kept open for reuse
+    KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+    # Seconds resolved host names are cached
+    DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    # Request timeouts in seconds
+    TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "30"))
+    CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+    READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+    USER_AGENT = os.getenv("HTTP_USER_AGENT", "NewsManager/1.0")
+
+class JobQueueConfig:
+    # "mongo", "local" (SQLite file) or "auto" (mongo, local if MongoDB is unreachable)
+    BACKEND = os.getenv("JOB_QUEUE_BACKEND", "auto")
+    LOCAL_PATH = os.getenv("JOB_QUEUE_LOCAL_PATH", ".cache/jobs.sqlite3")
+    # Seconds a claimed job stays leased to its worker before others may take it over
+    LEASE_SECONDS = float(os.getenv("JOB_QUEUE_LEASE_SECONDS", "900"))
+    # Attempts before a job is moved to the dead-letter state
+    MAX_ATTEMPTS = int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "5"))
+    # Retry delay in seconds: BACKOFF_BASE * 2 ** (attempt - 1), capped at BACKOFF_MAX
+    BACKOFF_BASE = float(os.getenv("JOB_QUEUE_BACKOFF_BASE", "60"))
+    BACKOFF_MAX = float(os.getenv("JOB_QUEUE_BACKOFF_MAX", "3600"))
+    # Seconds completed jobs are kept before they are deleted (dead jobs are kept until requeued)
+    DONE_RETENTION = int(os.getenv("JOB_QUEUE_DONE_RETENTION", str(7 * 24 * 3600)))
+
+class CacheConfig:
+    # Maximum number of news responses kept in memory by each API worker
+    NEWS_CACHE_MAX_ENTRIES = int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "10000"))
+    # Seconds a cached news response stays valid
+    NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "300"))
+    # Watch the news collection for inserts to invalidate the cache (needs a replica set)
+    NEWS_CACHE_WATCH_CHANGES = os.getenv("NEWS_CACHE_WATCH_CHANGES", "true").lower() == "true"
+
+class CrawlerConfig:
+    # Persistent cache of LLM extractions, keyed by URL, page content, prompt and model
+    EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+    EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", ".cache/extractions")
+    EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "20000"))
+    EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    EXTRACTION_CACHE_MAX_AGE = float(os.getenv("EXTRACTION_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+    # Crawl executor: "thread" or "process" pool running the scraper graphs
+    CRAWL_EXECUTOR = os.getenv("CRAWL_EXECUTOR", "thread")
+    CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS", str(os.cpu_count() or 3)))
+    # Crawls admitted beyond the running ones before producers have to wait
+    CRAWL_QUEUE_SIZE = int(os.getenv("CRAWL_QUEUE_SIZE", os.getenv("CRAWL_WORKERS", str(os.cpu_count() or 3))))
+    # Seconds a single crawl may take before it is abandoned
+    CRAWL_TASK_TIMEOUT = float(os.getenv("CRAWL_TASK_TIMEOUT", "180"))
+    # Read the non-generative fields from the page's HTML and only send the article text to the LLM
+    PRE_EXTRACTION_ENABLED = os.getenv("PRE_EXTRACTION_ENABLED", "true").lower() == "true"
+    # Shorter extracted articles fall back to the full LLM extraction of the page
+    PRE_EXTRACTION_MIN_ARTICLE_CHARS = int(os.getenv("PRE_EXTRACTION_MIN_ARTICLE_CHARS", "500"))
+    # Token budget of the article text sent to the LLM, after boilerplate and repeats are dropped
+    LLM_INPUT_MAX_TOKENS = int(os.getenv("LLM_INPUT_MAX_TOKENS", "2000"))
+    # Pre-extracted articles enriched together in one LLM request (1 disables batching),
+    # within a token budget for their combined text
+    ENRICH_BATCH_SIZE = int(os.getenv("ENRICH_BATCH_SIZE", "8"))
+    ENRICH_BATCH_MAX_TOKENS = int(os.getenv("ENRICH_BATCH_MAX_TOKENS", "12000"))
+    # Seconds a partial batch waits for more articles before it is sent
+    ENRICH_BATCH_MAX_WAIT = float(os.getenv("ENRICH_BATCH_MAX_WAIT", "2"))
 
 class Settings:
     PROJECT_NAME = "NewsManager"
@@ -18,6 +139,15 @@ class Settings:
     # API Configuration
     API_HOST = os.getenv("API_HOST", "http://localhost:8000")
     
+    # News page endpoint
+    NEWS_PAGE_SIZE = int(os.getenv("NEWS_PAGE_SIZE", "20"))
+    NEWS_PAGE_MAX_SIZE = int(os.getenv("NEWS_PAGE_MAX_SIZE", "100"))
+    # Fields returned by the news page endpoint when none are requested
+    NEWS_LIST_FIELDS = ["title", "category", "pubDate", "summary"]
+    # Search endpoint: deepest result reachable by paging, and the length of highlighted snippets
+    NEWS_SEARCH_MAX_RESULTS = int(os.getenv("NEWS_SEARCH_MAX_RESULTS", "1000"))
+    NEWS_SEARCH_SNIPPET_CHARS = int(os.getenv("NEWS_SEARCH_SNIPPET_CHARS", "200"))
+    
     # CORS Configuration
     default_origins = [
         "http://54.167.37.145:8080",
@@ -32,3 +162,10 @@ class Settings:
     CORS_HEADERS = ["*"]
     
     mongo = MongoConfig
+    feed_fetch = FeedFetchConfig
+    scheduler = SchedulerConfig
+    http = HttpConfig
+    ingest = IngestConfig
+    jobs = JobQueueConfig
+    cache = CacheConfig
+    crawler = CrawlerConfig
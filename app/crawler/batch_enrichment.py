@@ -0,0 +1,217 @@
+"""
+Batched LLM enrichment of pre-extracted articles.
+
+Articles whose page fields were extracted from the HTML only need the generative
+fields from the LLM. Instead of one request each, BatchEnricher packs several of them
+into a single request under a token budget, so the prompt and the per-request overhead
+are paid once per batch. The per-article results are validated; articles missing from
+the response or with invalid fields, and every article of a batch whose request failed,
+are enriched again with a single-article request.
+"""
+import json
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import CrawlerConfig
+from .crawler_config import generative_prompt, batch_generative_prompt
+from .crawl_executor import crawl_executor, run_smart_scraper
+from .content_reduction import count_tokens
+from .html_extract import GENERATIVE_FIELDS, MISSING
+
+SENTIMENTS = {"positive", "negative", "neutral"}
+
+def article_marker(article_id: str) -> str:
+    """Line that starts an article in the source of a batch request."""
+    return f"=== ARTICLE {article_id} ==="
+
+def validate_generated(entry: Any) -> Optional[Dict[str, Any]]:
+    """
+    Check and normalize the generated fields of one article.
+
+    Returns:
+        The generative fields, or None if one of them is missing or invalid
+    """
+    if not isinstance(entry, dict):
+        return None
+    sentiment = str(entry.get("sentiment") or "").strip().lower()
+    summary = entry.get("summary")
+    explained_summary = entry.get("explained_summary")
+    try:
+        importance_rating = int(float(entry.get("importance_rating")))
+    except (TypeError, ValueError):
+        return None
+    if isinstance(summary, str):
+        summary = [summary]
+    if sentiment not in SENTIMENTS or not 1 <= importance_rating <= 10:
+        return None
+    if not isinstance(summary, list) or not summary or not all(isinstance(point, str) for point in summary):
+        return None
+    if not isinstance(explained_summary, str) or not explained_summary.strip():
+        return None
+    return {
+        "sentiment": sentiment,
+        "summary": summary,
+        "explained_summary": explained_summary,
+        "importance_rating": importance_rating,
+    }
+
+def generated_fields(result: Any) -> Dict[str, Any]:
+    """
+    The generative fields of a single-article result: validated and normalized when they
+    all are, otherwise as the model returned them with MISSING for the absent ones.
+    """
+    generated = validate_generated(result)
+    if generated is not None:
+        return generated
+    result = result if isinstance(result, dict) else {}
+    print(f"Invalid generated fields, stored as returned with the missing ones as {MISSING}: {json.dumps(result, default=str)[:200]}")
+    return {field: MISSING if result.get(field) is None else result[field] for field in GENERATIVE_FIELDS}
+
+def _result_entries(raw: Any) -> List[Any]:
+    """The per-article list of a batch response, whichever key the model put it under."""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    if isinstance(raw, list):
+        return raw
+    if isinstance(raw, dict):
+        if isinstance(raw.get("articles"), list):
+            return raw["articles"]
+        for value in raw.values():
+            entries = _result_entries(value) if isinstance(value, (list, dict, str)) else []
+            if entries:
+                return entries
+    return []
+
+def split_batch_result(raw: Any, article_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Split a batch response into the generated fields of each article.
+
+    Entries are matched on their id, or on their position when the response has no ids
+    and exactly one entry per article.
+
+    Returns:
+        For each article ID, its validated fields, or None if the response has no valid entry for it
+    """
+    entries = _result_entries(raw)
+    by_id = {}
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get("id") is not None:
+            by_id.setdefault(str(entry["id"]).strip(), entry)
+    if not by_id and len(entries) == len(article_ids):
+        by_id = dict(zip(article_ids, entries))
+    return [validate_generated(by_id.get(article_id)) for article_id in article_ids]
+
+class BatchEnricher:
+    """
+    Collects enrichment requests and sends them to the LLM in batches.
+
+    A batch is sent once it has `max_articles` articles, once the next article would take
+    it over `max_tokens`, or `max_wait` seconds after its first article arrived.
+    """
+
+    def __init__(
+        self,
+        graph_config: Dict[str, Any],
+        max_articles: int = CrawlerConfig.ENRICH_BATCH_SIZE,
+        max_tokens: int = CrawlerConfig.ENRICH_BATCH_MAX_TOKENS,
+        max_wait: float = CrawlerConfig.ENRICH_BATCH_MAX_WAIT
+    ):
+        self.graph_config = graph_config
+        self.model = graph_config.get("llm", {}).get("model", "")
+        self.max_articles = max_articles
+        self.max_tokens = max_tokens
+        self.max_wait = max_wait
+        self.prompt_tokens = count_tokens(batch_generative_prompt, self.model)
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._next_id = 0
+        self.batches = 0
+        self.fallbacks = 0
+
+    async def enrich(self, source: str, tokens: int) -> Tuple[Dict[str, Any], int]:
+        """
+        Generate the fields of one article.
+
+        Args:
+            source: The reduced article text
+            tokens: Number of tokens of the source
+
+        Returns:
+            The generated fields, and the size of the batch they were generated in
+            (1 for a single-article request)
+        """
+        if self.max_articles <= 1 or tokens >= self.max_tokens:
+            return await self._enrich_single(source), 1
+
+        if self._pending and self._pending_tokens + tokens > self.max_tokens:
+            self._dispatch()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((source, future))
+        self._pending_tokens += tokens
+        if len(self._pending) >= self.max_articles:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        """Send the pending articles as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if not batch:
+            return
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _enrich_single(self, source: str) -> Dict[str, Any]:
+        result = await crawl_executor.run(run_smart_scraper, generative_prompt, source, self.graph_config)
+        return generated_fields(result)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        article_ids = []
+        parts = []
+        for source, _ in batch:
+            self._next_id += 1
+            article_ids.append(str(self._next_id))
+            parts.append(f"{article_marker(self._next_id)}\n{source}")
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        if len(batch) > 1:
+            self.batches += 1
+            try:
+                raw = await crawl_executor.run(run_smart_scraper, batch_generative_prompt, "\n\n".join(parts), self.graph_config)
+                results = split_batch_result(raw, article_ids)
+            except Exception as e:
+                print(f"Error in batch enrichment of {len(batch)} articles, falling back to single requests: {str(e)}")
+
+        async def settle(source, future, result):
+            batch_size = len(batch)
+            if result is None:
+                # Not validated in the batch response, enrich the article on its own
+                if len(batch) > 1:
+                    self.fallbacks += 1
+                batch_size = 1
+                try:
+                    result = await self._enrich_single(source)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+            if not future.done():
+                future.set_result((result, batch_size))
+
+        await asyncio.gather(*(
+            settle(source, future, result) for (source, future), result in zip(batch, results)
+        ))
+
+    def stats(self) -> Dict[str, int]:
+        """Number of batch requests sent and of articles that fell back to single requests."""
+        return {"batches": self.batches, "fallbacks": self.fallbacks}
@@ -0,0 +1,136 @@
+"""
+Reduction of article text before it is sent to the LLM.
+
+The text extracted from a page (see html_extract.py) still carries boilerplate
+paragraphs (newsletter prompts, share and follow lines, ad markers) and blocks that
+appear more than once (pull quotes, repeated captions). reduce_content() drops those
+and truncates what is left to a token budget at a paragraph boundary where possible.
+
+Tokens are counted with tiktoken when it is installed (it comes with the LLM stack),
+and estimated from the text length otherwise.
+"""
+import re
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from ..config import CrawlerConfig
+
+PARAGRAPH_SEPARATOR = "\n\n"
+
+# Paragraphs matching these are page furniture rather than article content
+BOILERPLATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"^(advertisement|advertising|sponsored|ad)$",
+    r"\b(sign up|subscribe) (to|for|now)\b",
+    r"\bnewsletter\b",
+    r"^(read|see) (more|also)\b",
+    r"^(related|recommended|more from|most popular|trending)\b",
+    r"\b(share|follow) (this|us|on)\b",
+    r"(\ball rights reserved\b|\bcopyright\b|©)",
+    r"\b(cookie|cookies) (policy|settings|preferences)\b",
+    r"\bclick here\b",
+    r"\bdownload (the|our) app\b",
+    r"^(comments?|join the conversation)\b",
+)]
+# Boilerplate patterns are only applied to paragraphs up to this length
+BOILERPLATE_MAX_CHARS = 300
+
+# Characters per token of English text, used when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """tiktoken encoding of a model, None if tiktoken is not installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        # Model names are prefixed with their provider in the graph config ("openai/gpt-4o-mini")
+        return tiktoken.encoding_for_model(model.split("/")[-1])
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def tokenizer_name(model: str = "") -> str:
+    """Name of the tokenizer count_tokens uses for a model."""
+    encoding = _encoding(model)
+    return f"tiktoken:{encoding.name}" if encoding is not None else "estimate"
+
+def count_tokens(text: str, model: str = "") -> int:
+    """Number of tokens of a text for a model."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "") -> str:
+    """Cut a text to at most `max_tokens` tokens."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+def is_boilerplate(paragraph: str) -> bool:
+    """Whether a paragraph is page furniture rather than article content."""
+    if len(paragraph) > BOILERPLATE_MAX_CHARS:
+        return False
+    return any(pattern.search(paragraph) for pattern in BOILERPLATE_PATTERNS)
+
+def clean_paragraphs(text: str) -> List[str]:
+    """Split a text into paragraphs, dropping boilerplate and repeated paragraphs."""
+    paragraphs = []
+    seen = set()
+    for paragraph in text.split(PARAGRAPH_SEPARATOR):
+        paragraph = paragraph.strip()
+        if not paragraph or is_boilerplate(paragraph):
+            continue
+        key = hashlib.sha1(re.sub(r"\W+", " ", paragraph.lower()).strip().encode("utf-8")).digest()
+        if key in seen:
+            continue
+        seen.add(key)
+        paragraphs.append(paragraph)
+    return paragraphs
+
+def reduce_content(
+    text: str,
+    max_tokens: int = CrawlerConfig.LLM_INPUT_MAX_TOKENS,
+    model: str = "",
+    header: str = ""
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Reduce an article text to what the LLM needs, within a token budget.
+
+    Args:
+        text: Article text, paragraphs separated by blank lines
+        max_tokens: Token budget of the reduced text, header included
+        model: Model the text is for, selects the tokenizer
+        header: Text kept in front of the article (e.g. its title and date)
+
+    Returns:
+        The reduced text, and its stats: 'tokens_original' (the text before reduction),
+        'tokens_in' (the reduced text), 'truncated' and 'tokenizer'
+    """
+    original = f"{header}{text}"
+    reduced = header
+    budget = max_tokens - count_tokens(header, model)
+    truncated = False
+    for paragraph in clean_paragraphs(text):
+        separator = PARAGRAPH_SEPARATOR if reduced != header else ""
+        tokens = count_tokens(separator + paragraph, model)
+        if tokens <= budget:
+            reduced += separator + paragraph
+            budget -= tokens
+            continue
+        # Keep the start of the paragraph that crosses the budget, then stop
+        if budget > 0:
+            reduced += truncate_to_tokens(separator + paragraph, budget, model)
+        truncated = True
+        break
+
+    return reduced, {
+        "tokens_original": count_tokens(original, model),
+        "tokens_in": count_tokens(reduced, model),
+        "truncated": truncated,
+        "tokenizer": tokenizer_name(model),
+    }
@@ -0,0 +1,185 @@
+"""
+Dedicated executor for the crawl/extraction work.
+
+Scraper graphs run in their own thread or process pool instead of the default
+asyncio thread pool. At most `max_workers` crawls run at once and at most
+`queue_size` more are queued for a worker; callers beyond that wait in run() to be
+admitted, which is how producers are slowed down when the pool is saturated.
+"""
+import time
+import asyncio
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..config import CrawlerConfig
+
+# Number of recent task latencies kept for the percentiles
+LATENCY_WINDOW = 500
+
+class CrawlTimeoutError(Exception):
+    """Raised when a crawl task takes longer than the executor's task timeout."""
+    pass
+
+def run_smart_scraper(prompt: str, source: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a SmartScraperGraph. Module-level so it can be sent to a process pool."""
+    from scrapegraphai.graphs import SmartScraperGraph
+
+    smart_scraper_graph = SmartScraperGraph(prompt=prompt, source=source, config=config)
+    return smart_scraper_graph.run()
+
+class CrawlExecutor:
+    """
+    Bounded thread or process pool for crawl tasks.
+
+    A timed-out or cancelled task stops being awaited right away, but the call
+    already running in a worker cannot be interrupted: its slot is only given
+    back once the call returns, so the pool is never oversubscribed.
+    """
+
+    def __init__(
+        self,
+        kind: str = CrawlerConfig.CRAWL_EXECUTOR,
+        max_workers: int = CrawlerConfig.CRAWL_WORKERS,
+        queue_size: int = CrawlerConfig.CRAWL_QUEUE_SIZE,
+        task_timeout: Optional[float] = CrawlerConfig.CRAWL_TASK_TIMEOUT
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown crawl executor kind '{kind}', expected 'thread' or 'process'")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.task_timeout = task_timeout
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._admission: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.blocked = 0
+        self.waiting = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    @property
+    def capacity(self) -> int:
+        """Number of crawls admitted at once: the running ones plus the queue."""
+        return self.max_workers + self.queue_size
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Spawned workers do not inherit the parent's event loop, sockets or threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="crawl"
+                )
+        return self._executor
+
+    def _get_semaphores(self) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        """The admission (running plus queued crawls) and worker slot semaphores of the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._admission = asyncio.Semaphore(self.capacity)
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._loop = loop
+        return self._admission, self._slots
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) in the pool, waiting to be admitted to the queue (once `capacity`
+        crawls are admitted) and then for a free worker.
+
+        Raises:
+            CrawlTimeoutError: If the call takes longer than the task timeout
+        """
+        admission, slots = self._get_semaphores()
+        self.submitted += 1
+        self.blocked += 1
+        try:
+            await admission.acquire()
+        finally:
+            self.blocked -= 1
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        except BaseException:
+            admission.release()
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        started_at = time.monotonic()
+
+        def on_done(future: asyncio.Future) -> None:
+            self.running -= 1
+            self._latencies.append(time.monotonic() - started_at)
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+            slots.release()
+            admission.release()
+
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        except Exception:
+            self.running -= 1
+            slots.release()
+            admission.release()
+            raise
+        future.add_done_callback(on_done)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.task_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise CrawlTimeoutError(f"Crawl task timed out after {self.task_timeout}s")
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Callers waiting for admission, queue depth, running tasks, outcome counters and recent task latencies."""
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "queue_size": self.queue_size,
+            "blocked": self.blocked,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool. Queued calls that have not started are dropped."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+crawl_executor = CrawlExecutor()
@@ -25,3 +25,24 @@ prompt="""Extract All the news information from the news page. Extract the
                 3. explained_summary (should be a text summary, with history and context so that a new reader can understand the context of the news),
                 4. importance_rating (1-10, where 10 is a breaking news and 1 is not important).
                 """
+
+# Used when the page fields were already extracted from the HTML (see html_extract.py),
+# the source is then the article text instead of the page
+generative_prompt="""Based on the news article below, generate these fields:
+                1. sentiment (positive, negative, neutral),
+                2. summary ( should be a list of precise bullet points, each bullet point should be less than 100 words),
+                3. explained_summary (should be a text summary, with history and context so that a new reader can understand the context of the news),
+                4. importance_rating (1-10, where 10 is a breaking news and 1 is not important).
+                """
+
+# Used to enrich several pre-extracted articles in one request (see batch_enrichment.py),
+# the source then holds the articles, each after an "=== ARTICLE <id> ===" line
+batch_generative_prompt="""The text contains several news articles, each starting with a line "=== ARTICLE <id> ===".
+                For every article, generate these fields:
+                1. sentiment (positive, negative, neutral),
+                2. summary ( should be a list of precise bullet points, each bullet point should be less than 100 words),
+                3. explained_summary (should be a text summary, with history and context so that a new reader can understand the context of the news),
+                4. importance_rating (1-10, where 10 is a breaking news and 1 is not important).
+                Return {"articles": [...]} with one object per article, in the same order, each with its "id"
+                and the four fields. Do not mix information between articles.
+                """
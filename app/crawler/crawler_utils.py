@@ -1,33 +1,120 @@
 import os
-from scrapegraphai.graphs import SmartScraperGraph
 import json
-from .crawler_config import prompt, graph_config
+from typing import Any, Dict, Optional
+from .crawler_config import prompt, generative_prompt, graph_config
+from .html_extract import extract_article, visible_text, MISSING
+from .content_reduction import reduce_content, count_tokens, tokenizer_name
+from .extraction_cache import extraction_cache, page_content_hash
+from .crawl_executor import crawl_executor, run_smart_scraper
+from .batch_enrichment import generated_fields
+from ..http_client import HttpClient
+from ..config import CrawlerConfig
 import asyncio
 
-async def smart_news_crawler(source_link, prompt=prompt, graph_config=graph_config):
-    # Create the SmartScraperGraph instance
-    smart_scraper_graph = SmartScraperGraph(
-        prompt=prompt,
-        source=source_link,
-        config=graph_config
-    )
+async def fetch_page(source_link: str) -> Optional[str]:
+    """Fetch the raw HTML of a page with the shared HTTP client, None if it fails."""
+    try:
+        session = HttpClient.get_session()
+        async with session.get(source_link) as response:
+            if response.status != 200:
+                print(f"Failed to fetch page {source_link}. HTTP Status Code: {response.status}")
+                return None
+            return await response.text()
+    except Exception as e:
+        print(f"Error fetching page {source_link}: {str(e)}")
+        return None
 
-    # Run the pipeline (ensure async execution is handled properly)
-    result = await asyncio.to_thread(smart_scraper_graph.run)
+# Field of the crawler output recording the LLM input size, to track token savings
+LLM_INPUT_FIELD = "llm_input"
 
-    # Save the result to a JSON file
-    with open("result.json", "w") as f:
-        json.dump(result, f, indent=4)
+def _generative_source(extracted: Dict[str, Any], model: str) -> tuple:
+    """Reduced article text sent to the LLM for the generative fields, and its token stats."""
+    header = f"Title: {extracted['title']}\nDate: {extracted['date']}\n\n"
+    return reduce_content(extracted["article"], model=model, header=header)
+
+async def smart_news_crawler(
+    source_link,
+    prompt=prompt,
+    graph_config=graph_config,
+    news_item: Optional[Dict[str, Any]] = None,
+    batcher=None
+):
+    """
+    Extract a news article. The page fields are read from the HTML when possible, and
+    the LLM only generates the remaining fields from the article text, reduced to a
+    token budget. Pages whose article text cannot be found are extracted entirely by
+    the LLM. The tokens sent to the LLM are recorded in the result's 'llm_input'.
+
+    Args:
+    - source_link (str): The article URL.
+    - prompt (str): The full extraction prompt, used for the LLM-only fallback.
+    - graph_config (dict): The SmartScraperGraph configuration.
+    - news_item (dict): The feed item of the article, whose title and pubDate fill gaps.
+    - batcher (BatchEnricher): When given, the generative fields of pre-extracted articles
+      are requested in batches with other articles.
+
+    Returns:
+    - dict: The extracted and generated fields.
+    """
+    model = graph_config.get("llm", {}).get("model", "")
+    page_html = await fetch_page(source_link)
+
+    extracted = None
+    llm_prompt, llm_source = prompt, source_link
+    if page_html and CrawlerConfig.PRE_EXTRACTION_ENABLED:
+        extracted = extract_article(page_html, source_link, news_item)
+        if extracted["article"] != MISSING and len(extracted["article"]) >= CrawlerConfig.PRE_EXTRACTION_MIN_ARTICLE_CHARS:
+            llm_prompt = generative_prompt
+            llm_source, llm_input = _generative_source(extracted, model)
+            llm_input["source"] = "article"
+        else:
+            extracted = None
+    if extracted is None:
+        # The scraper reads the whole page, its visible text approximates what the LLM gets
+        page_tokens = count_tokens(visible_text(page_html), model) if page_html else None
+        llm_input = {"source": "page", "tokens_original": page_tokens, "tokens_in": page_tokens,
+                     "truncated": False, "tokenizer": tokenizer_name(model)}
+    llm_input["tokens_prompt"] = count_tokens(llm_prompt, model)
+
+    # Look the page up in the extraction cache first, a hit skips the browser and the LLM
+    content_hash = page_content_hash(page_html) if page_html else None
+    if content_hash:
+        cached_result = await extraction_cache.get(source_link, content_hash, llm_prompt, model)
+        if cached_result is not None:
+            print(f"Extraction cache hit: {source_link}")
+            # Nothing was sent to the LLM this time, the stored stats are those of the original call
+            return {**cached_result, LLM_INPUT_FIELD: {**llm_input, "tokens_in": 0, "tokens_prompt": 0, "cache_hit": True}}
+
+    if extracted is not None and batcher is not None:
+        result, batch_size = await batcher.enrich(llm_source, llm_input["tokens_in"])
+        # The batch prompt is shared by the articles of the batch
+        llm_input["batch_size"] = batch_size
+        if batch_size > 1:
+            llm_input["tokens_prompt"] = batcher.prompt_tokens // batch_size
+    else:
+        # Run the SmartScraperGraph pipeline in the crawl executor
+        result = await crawl_executor.run(run_smart_scraper, llm_prompt, llm_source, graph_config)
+    if extracted is not None:
+        # Only the generative fields come from the LLM
+        result = {**extracted, **generated_fields(result)}
+    if result:
+        result[LLM_INPUT_FIELD] = llm_input
+
+    if content_hash and result:
+        await extraction_cache.set(source_link, content_hash, llm_prompt, model, result)
 
     return result
 
 async def main():
     source_link = "https://www.straitstimes.com/world/europe/trumps-ukraine-envoy-keith-kellogg-attends-iran-opposition-event-in-paris"
-    result = await smart_news_crawler(source_link)
-    print(json.dumps(result, indent=4))
+    try:
+        result = await smart_news_crawler(source_link)
+        print(json.dumps(result, indent=4))
+    finally:
+        await HttpClient.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
 
 # To run this file as a script:
-# python -m app.crawler.crawler_utils
\ No newline at end of file
+# python -m app.crawler.crawler_utils
@@ -0,0 +1,173 @@
+"""
+Persistent cache of LLM extractions.
+
+An extraction is stored under a key built from the canonical article URL, a hash of
+the page's visible content, the prompt version and the model, so a cached result is
+only reused for the same page content extracted the same way. Entries live on the
+local disk, one JSON file each, and are evicted by age and by total count/size.
+The file I/O runs in a worker thread, off the event loop.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from ..config import CrawlerConfig
+from ..normalization import canonical_link
+from .html_extract import visible_text
+
+# Number of writes between two eviction passes
+PRUNE_EVERY = 50
+
+def page_content_hash(page_html: str) -> str:
+    """
+    Hash the visible text of a page, ignoring scripts, styles and markup, which
+    change between requests (ads, tokens, timestamps) without changing the article.
+    """
+    return hashlib.sha256(visible_text(page_html).encode("utf-8")).hexdigest()
+
+def prompt_version(prompt: str) -> str:
+    """Version of a prompt, changes whenever the prompt text changes."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+def extraction_key(url: str, content_hash: str, prompt: str, model: str) -> str:
+    """Cache key of an extraction."""
+    parts = [canonical_link(url) or "", content_hash, prompt_version(prompt), model or ""]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+class DiskCacheBackend:
+    """
+    Stores each entry as a JSON file under `directory`, sharded by key prefix.
+    File modification times track the last use of an entry for eviction.
+    """
+
+    def __init__(
+        self,
+        directory: str = CrawlerConfig.EXTRACTION_CACHE_DIR,
+        max_entries: int = CrawlerConfig.EXTRACTION_CACHE_MAX_ENTRIES,
+        max_bytes: int = CrawlerConfig.EXTRACTION_CACHE_MAX_BYTES,
+        max_age: float = CrawlerConfig.EXTRACTION_CACHE_MAX_AGE
+    ):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._writes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get an entry, or None if it is missing, expired or unreadable."""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # Mark the entry as recently used
+            os.utime(path)
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error reading extraction cache entry {key}: {str(e)}")
+            return None
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry, atomically replacing any previous one."""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing extraction cache entry {key}: {str(e)}")
+            return
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Remove expired entries, then the least recently used ones until the cache
+        is within its entry count and size limits.
+
+        Returns:
+            Number of entries removed
+        """
+        files: List[tuple] = []
+        now = time.time()
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                stat = entry.stat()
+                if now - stat.st_mtime > self.max_age:
+                    removed += self._remove(entry.path)
+                else:
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        files.sort()
+        total_bytes = sum(size for _, size, _ in files)
+        count = len(files)
+        for _, size, path in files:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            count -= 1
+            total_bytes -= size
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+class ExtractionCache:
+    """Cache of LLM extractions on top of a (blocking) storage backend."""
+
+    def __init__(self, backend, enabled: bool = CrawlerConfig.EXTRACTION_CACHE_ENABLED):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, url: str, content_hash: str, prompt: str, model: str) -> Optional[Dict[str, Any]]:
+        """Get the stored extraction of a page, or None."""
+        if not self.enabled:
+            return None
+        entry = await asyncio.to_thread(self.backend.get, extraction_key(url, content_hash, prompt, model))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["extraction"]
+
+    async def set(self, url: str, content_hash: str, prompt: str, model: str, extraction: Dict[str, Any]) -> None:
+        """Store the extraction of a page, pruning the backend every PRUNE_EVERY writes."""
+        if not self.enabled:
+            return
+        await asyncio.to_thread(self.backend.set, extraction_key(url, content_hash, prompt, model), {
+            "url": canonical_link(url),
+            "content_hash": content_hash,
+            "prompt_version": prompt_version(prompt),
+            "model": model,
+            "created_at": time.time(),
+            "extraction": extraction,
+        })
+
+extraction_cache = ExtractionCache(DiskCacheBackend())
@@ -0,0 +1,270 @@
+"""
+Deterministic extraction of article fields from a news page's HTML.
+
+Title, author, date, article text, keywords, image and video links and related links
+are read from the page's structured metadata (OpenGraph and article meta tags,
+JSON-LD NewsArticle objects) and from its <article> element, without a model. Only
+the generative fields are left to the LLM, which then gets the article text instead
+of the whole page.
+"""
+import re
+import json
+from html import unescape
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+# Value the LLM prompt uses for fields that are not on the page
+MISSING = "NA"
+
+# Fields of the crawler output that are read from the page
+EXTRACTED_FIELDS = (
+    "title", "author", "date", "article", "keywords",
+    "image_links", "video_links", "related_news_links",
+)
+
+# Fields of the crawler output that only the LLM can produce
+GENERATIVE_FIELDS = ("sentiment", "summary", "explained_summary", "importance_rating")
+
+# Elements whose text is never part of the article
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer",
+                "aside", "form", "button", "figcaption"}
+# Elements that end a block of text
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "h5", "h6", "li", "blockquote", "div", "section", "br", "pre"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+
+JSON_LD_ARTICLE_TYPES = {"NewsArticle", "Article", "ReportageNewsArticle", "AnalysisNewsArticle",
+                         "BlogPosting", "LiveBlogPosting"}
+WHITESPACE_PATTERN = re.compile(r"\s+")
+SCRIPT_STYLE_PATTERN = re.compile(r"<(script|style|noscript)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+# Paragraphs shorter than this are treated as boilerplate (bylines, share buttons, captions)
+MIN_PARAGRAPH_CHARS = 40
+
+class _PageParser(HTMLParser):
+    """Collects meta tags, JSON-LD scripts, links, media and the text blocks of a page."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, List[str]] = {}
+        self.json_ld: List[str] = []
+        self.title: Optional[str] = None
+        self.images: List[str] = []
+        self.videos: List[str] = []
+        self.links: List[str] = []
+        self.article_blocks: List[str] = []
+        self.page_blocks: List[str] = []
+        self._stack: List[str] = []
+        self._skip_depth = 0
+        self._article_depth = 0
+        self._json_ld_depth = 0
+        self._title_depth = 0
+        self._text: List[str] = []
+        self._script_text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or "" for name, value in attrs}
+        if tag == "meta":
+            key = (attrs.get("property") or attrs.get("name") or attrs.get("itemprop") or "").lower()
+            if key and attrs.get("content"):
+                self.meta.setdefault(key, []).append(attrs["content"].strip())
+            return
+        if tag in VOID_TAGS:
+            if tag == "img" and self._article_depth and not self._skip_depth:
+                src = attrs.get("src") or attrs.get("data-src")
+                if src:
+                    self.images.append(src)
+            elif tag == "source" and self._stack and self._stack[-1] == "video" and attrs.get("src"):
+                self.videos.append(attrs["src"])
+            elif tag == "br":
+                self._end_block()
+            return
+
+        self._stack.append(tag)
+        if tag == "script" and attrs.get("type", "").lower() == "application/ld+json":
+            self._json_ld_depth = len(self._stack)
+            self._script_text = []
+        elif tag in SKIPPED_TAGS:
+            self._skip_depth = self._skip_depth or len(self._stack)
+        elif tag == "article" and not self._article_depth:
+            self._end_block()
+            self._article_depth = len(self._stack)
+        elif tag == "title" and self.title is None:
+            self._title_depth = len(self._stack)
+        elif tag == "video" and attrs.get("src"):
+            self.videos.append(attrs["src"])
+        elif tag == "iframe" and attrs.get("src") and _is_video_embed(attrs["src"]):
+            self.videos.append(attrs["src"])
+        elif tag == "a" and self._article_depth and not self._skip_depth and attrs.get("href"):
+            self.links.append(attrs["href"])
+        if tag in BLOCK_TAGS:
+            self._end_block()
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS or tag not in self._stack:
+            return
+        # Close any unclosed children as well
+        while self._stack:
+            depth = len(self._stack)
+            closed = self._stack.pop()
+            if depth == self._json_ld_depth:
+                self.json_ld.append("".join(self._script_text))
+                self._json_ld_depth = 0
+            if depth == self._skip_depth:
+                self._skip_depth = 0
+            if depth == self._title_depth:
+                self.title = _clean_text("".join(self._text))
+                self._text = []
+                self._title_depth = 0
+            if closed in BLOCK_TAGS:
+                self._end_block()
+            if depth == self._article_depth:
+                self._end_block()
+                self._article_depth = 0
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if self._json_ld_depth:
+            self._script_text.append(data)
+        elif not self._skip_depth:
+            self._text.append(data)
+
+    def _end_block(self):
+        if self._title_depth:
+            return
+        text = _clean_text("".join(self._text))
+        self._text = []
+        if text:
+            (self.article_blocks if self._article_depth else self.page_blocks).append(text)
+
+def visible_text(page_html: str) -> str:
+    """All the text of a page without scripts, styles and markup, whitespace collapsed."""
+    text = SCRIPT_STYLE_PATTERN.sub(" ", page_html)
+    return WHITESPACE_PATTERN.sub(" ", TAG_PATTERN.sub(" ", text)).strip()
+
+def _clean_text(text: str) -> str:
+    return WHITESPACE_PATTERN.sub(" ", unescape(text)).strip()
+
+def _is_video_embed(url: str) -> bool:
+    host = urlparse(url).netloc.lower()
+    return any(site in host for site in ("youtube.com", "youtu.be", "vimeo.com", "brightcove", "jwplayer", "dailymotion"))
+
+def _json_ld_articles(scripts: List[str]) -> List[Dict[str, Any]]:
+    """The article objects of the page's JSON-LD scripts, including ones nested in @graph."""
+    articles = []
+    pending = []
+    for script in scripts:
+        try:
+            pending.append(json.loads(script))
+        except ValueError:
+            continue
+    while pending:
+        node = pending.pop(0)
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, dict):
+            if "@graph" in node:
+                pending.extend(node["@graph"] if isinstance(node["@graph"], list) else [node["@graph"]])
+            types = node.get("@type")
+            types = set(types) if isinstance(types, list) else {types}
+            if types & JSON_LD_ARTICLE_TYPES:
+                articles.append(node)
+    return articles
+
+def _names(value: Any) -> List[str]:
+    """Names from a JSON-LD author/keywords value (string, object or list of either)."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [name for item in value for name in _names(item)]
+    if isinstance(value, dict):
+        return _names(value.get("name"))
+    return [part.strip() for part in str(value).split(",") if part.strip()]
+
+def _urls(value: Any) -> List[str]:
+    """URLs from a JSON-LD image/video value (string, ImageObject or list of either)."""
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [url for item in value for url in _urls(item)]
+    if isinstance(value, dict):
+        return _urls(value.get("url") or value.get("contentUrl") or value.get("embedUrl"))
+    return [str(value)]
+
+def _unique(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(value for value in values if value))
+
+def extract_article(page_html: str, page_url: str, news_item: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Extract the non-generative article fields from a page.
+
+    Args:
+        page_html: HTML of the article page
+        page_url: URL of the page, used to resolve relative links
+        news_item: The feed item of the article; its title and pubDate are used when
+            the page has none
+
+    Returns:
+        Dict with the EXTRACTED_FIELDS, MISSING for the ones not found on the page.
+        Lists are empty rather than MISSING.
+    """
+    parser = _PageParser()
+    try:
+        parser.feed(page_html)
+        parser.close()
+    except Exception as e:
+        print(f"Error parsing page {page_url}: {str(e)}")
+    news_item = news_item or {}
+    meta = parser.meta
+    ld = _json_ld_articles(parser.json_ld)
+    ld_article = ld[0] if ld else {}
+
+    def first(*values):
+        for value in values:
+            if isinstance(value, list):
+                value = value[0] if value else None
+            if value:
+                return value
+        return None
+
+    # Prefer the <article> element, then the JSON-LD body, then the page's long paragraphs
+    blocks = [block for block in parser.article_blocks if len(block) >= MIN_PARAGRAPH_CHARS]
+    article = "\n\n".join(blocks)
+    ld_body = _clean_text(ld_article.get("articleBody") or "")
+    if len(ld_body) > len(article):
+        article = ld_body
+    if not article:
+        article = "\n\n".join(block for block in parser.page_blocks if len(block) >= MIN_PARAGRAPH_CHARS)
+
+    authors = _names(ld_article.get("author")) or meta.get("author", []) or meta.get("article:author", [])
+    keywords = _names(ld_article.get("keywords")) or _names(first(meta.get("keywords"), meta.get("news_keywords")))
+    keywords += meta.get("article:tag", [])
+
+    images = _urls(ld_article.get("image")) + meta.get("og:image", []) + meta.get("twitter:image", []) + parser.images
+    videos = _urls(ld_article.get("video")) + meta.get("og:video", []) + meta.get("og:video:url", []) + parser.videos
+
+    host = urlparse(page_url).netloc
+    own_url = page_url.split("#")[0].rstrip("/")
+    related = []
+    for href in parser.links:
+        url = urljoin(page_url, href).split("#")[0]
+        parsed = urlparse(url)
+        # Related articles are other pages of the same site, with a path deeper than a section
+        if parsed.scheme in ("http", "https") and parsed.netloc == host and url.rstrip("/") != own_url \
+                and parsed.path.count("/") >= 2:
+            related.append(url)
+
+    return {
+        "title": first(ld_article.get("headline"), meta.get("og:title"), meta.get("twitter:title"),
+                       parser.title, news_item.get("title")) or MISSING,
+        "author": ", ".join(_unique(authors)) or MISSING,
+        "date": first(ld_article.get("datePublished"), meta.get("article:published_time"),
+                      meta.get("datepublished"), meta.get("date"), news_item.get("pubDate")) or MISSING,
+        "article": article or MISSING,
+        "keywords": _unique(keywords),
+        "image_links": _unique(urljoin(page_url, url) for url in images),
+        "video_links": _unique(urljoin(page_url, url) for url in videos),
+        "related_news_links": _unique(related),
+    }
@@ -0,0 +1,59 @@
+"""
+Process-wide pooled HTTP client shared by all news channel fetchers.
+"""
+import asyncio
+import aiohttp
+from typing import Optional
+from .config import HttpConfig
+
+class HttpClient:
+    session: Optional[aiohttp.ClientSession] = None
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def _create_session(cls) -> aiohttp.ClientSession:
+        """Create a new session with the configured connection pool and timeouts."""
+        connector = aiohttp.TCPConnector(
+            limit=HttpConfig.POOL_SIZE,
+            limit_per_host=HttpConfig.POOL_SIZE_PER_HOST,
+            keepalive_timeout=HttpConfig.KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HttpConfig.DNS_CACHE_TTL,
+            use_dns_cache=True,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=HttpConfig.TOTAL_TIMEOUT,
+            connect=HttpConfig.CONNECT_TIMEOUT,
+            sock_read=HttpConfig.READ_TIMEOUT,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={"User-Agent": HttpConfig.USER_AGENT},
+        )
+
+    @classmethod
+    def get_session(cls) -> aiohttp.ClientSession:
+        """
+        Get the shared session, creating it on first use.
+        Must be called from within a running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if cls.session is None or cls.session.closed or cls._loop is not loop:
+            # A session can only be used on the loop it was created on, so
+            # scripts that call asyncio.run() more than once get a fresh one.
+            cls.session = cls._create_session()
+            cls._loop = loop
+        return cls.session
+
+    @classmethod
+    async def start(cls) -> None:
+        """Create the shared session."""
+        cls.get_session()
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared session and its connection pool."""
+        if cls.session is not None and not cls.session.closed:
+            await cls.session.close()
+        cls.session = None
+        cls._loop = None
@@ -0,0 +1,247 @@
+"""
+Declarative index management.
+
+INDEX_SPECS lists the indexes every collection should have. reconcile_indexes()
+compares them with the live indexes and creates (or rebuilds) whatever is missing,
+and is safe to run on every startup. QUERY_SHAPES lists the query shapes used by the
+routes and the ingest pipeline; check_query_shapes() fails when one of them is not
+supported by a declared index.
+
+Usage:
+    python -m app.indexes diff            # show what apply would change
+    python -m app.indexes apply [--prune] # create missing indexes (and drop undeclared ones)
+    python -m app.indexes check           # check the query shapes against the live indexes
+"""
+import sys
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from .mongo import AsyncMongoClient
+from .config import MongoConfig, JobQueueConfig
+
+# Index options compared when deciding whether an index has to be rebuilt
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "weights", "default_language")
+
+# Past tense of each change action, for the log; undeclared indexes are dropped
+APPLIED_ACTIONS = {"create": "created", "rebuild": "rebuilt", "undeclared": "dropped"}
+
+# Query shape of a $text search, supported by the collection's text index
+TEXT_SHAPE = ("$text",)
+
+INDEX_SPECS: Dict[str, List[Dict[str, Any]]] = {
+    MongoConfig.NEWS_COLLECTION: [
+        # Category filter with _id range scans and sorts (navigation)
+        {"name": "category_1__id_1", "keys": [("category", 1), ("_id", 1)]},
+        # Batch dedup of feed items, documents stored before dedup keys existed have none
+        {"name": "dedup_key_1", "keys": [("dedup_key", 1)], "unique": True, "sparse": True},
+        # Publication date ranges (search date filters), pubDate is an unsortable RFC 822 string
+        {"name": "published_at_-1", "keys": [("published_at", -1)]},
+        # Near-duplicate candidates sharing a SimHash band (multikey), documents without a hash have none
+        {"name": "simhash_bands_1", "keys": [("simhash_bands", 1)], "sparse": True},
+        # Full-text search (a collection has at most one text index), title matches rank highest
+        {
+            "name": "news_text",
+            "keys": [("title", "text"), ("keywords", "text"), ("summary", "text"),
+                     ("description", "text"), ("article", "text")],
+            "weights": {"title": 10, "keywords": 6, "summary": 4, "description": 3, "article": 1},
+            "default_language": "english",
+        },
+    ],
+    MongoConfig.FEED_STATE_COLLECTION: [],
+    MongoConfig.CATEGORY_STATS_COLLECTION: [],
+    MongoConfig.JOBS_COLLECTION: [
+        # Claiming available jobs, oldest first
+        {"name": "kind_1_status_1_available_at_1", "keys": [("kind", 1), ("status", 1), ("available_at", 1)]},
+        # Reclaiming jobs whose lease expired
+        {"name": "kind_1_status_1_lease_expires_at_1", "keys": [("kind", 1), ("status", 1), ("lease_expires_at", 1)]},
+        # Deletes completed jobs once their retention is over, only done jobs have completed_at
+        {"name": "completed_at_1", "keys": [("completed_at", 1)], "expireAfterSeconds": JobQueueConfig.DONE_RETENTION},
+    ],
+}
+
+# Query shapes (equality fields first, then sort/range fields) that must be index-backed
+QUERY_SHAPES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "GET /news/get_news_simple": (MongoConfig.NEWS_COLLECTION, ("_id",)),
+    "GET /news/get_news_simple?category": (MongoConfig.NEWS_COLLECTION, ("category", "_id")),
+    "GET /news": (MongoConfig.NEWS_COLLECTION, ("_id",)),
+    "GET /news?category": (MongoConfig.NEWS_COLLECTION, ("category", "_id")),
+    "GET /news/{news_id}": (MongoConfig.NEWS_COLLECTION, ("_id",)),
+    "GET /news/search": (MongoConfig.NEWS_COLLECTION, TEXT_SHAPE),
+    "GET /news/{news_id}/related": (MongoConfig.NEWS_COLLECTION, ("_id",)),
+    "GET /news/categories": (MongoConfig.CATEGORY_STATS_COLLECTION, ()),
+    "ingest: batch dedup": (MongoConfig.NEWS_COLLECTION, ("dedup_key",)),
+    "ingest: near-duplicate candidates": (MongoConfig.NEWS_COLLECTION, ("simhash_bands",)),
+    "ingest: near-duplicate canonical": (MongoConfig.NEWS_COLLECTION, ("dedup_key",)),
+    "ingest: related articles window": (MongoConfig.NEWS_COLLECTION, ("_id",)),
+    "ingest: feed state": (MongoConfig.FEED_STATE_COLLECTION, ("_id",)),
+    "ingest: category stats": (MongoConfig.CATEGORY_STATS_COLLECTION, ("_id",)),
+    "jobs: claim pending": (MongoConfig.JOBS_COLLECTION, ("kind", "status", "available_at")),
+    "jobs: claim expired lease": (MongoConfig.JOBS_COLLECTION, ("kind", "status", "lease_expires_at")),
+}
+
+class MissingIndexError(Exception):
+    """Raised when a query shape has no supporting index."""
+    pass
+
+def _is_text_index(keys: List[Tuple[str, Any]]) -> bool:
+    """Whether index keys (declared, or live with the internal _fts field) are a text index."""
+    return any(direction == "text" for _, direction in keys)
+
+def _normalize(keys: List[Tuple[str, Any]], options: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Comparable form of an index definition."""
+    options = dict(options)
+    if _is_text_index(keys):
+        # MongoDB reports a text index as _fts/_ftsx keys with the fields in its weights,
+        # declared text fields without a weight get weight 1
+        weights = {field: 1 for field, direction in keys if direction == "text" and field != "_fts"}
+        weights.update(options.get("weights") or {})
+        options["weights"] = {field: int(weight) for field, weight in sorted(weights.items())}
+        options.setdefault("default_language", "english")
+        keys = [(field, direction) for field, direction in keys
+                if direction != "text" and field != "_ftsx"] + [("_fts", "text"), ("_ftsx", 1)]
+    normalized_keys = tuple((field, direction if isinstance(direction, str) else int(direction))
+                            for field, direction in keys)
+    normalized_options = tuple(
+        (option, options.get(option)) for option in INDEX_OPTIONS
+        if options.get(option) not in (None, False)
+    )
+    return normalized_keys, normalized_options
+
+def _index_options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """create_index options of an index spec."""
+    return {option: spec[option] for option in INDEX_OPTIONS if spec.get(option) is not None}
+
+async def diff_indexes(
+    specs: Dict[str, List[Dict[str, Any]]] = INDEX_SPECS,
+    database: str = MongoConfig.NEWS_DATABASE
+) -> List[Dict[str, Any]]:
+    """
+    Compare the declared indexes with the live ones.
+
+    Returns:
+        List of changes, each with 'action' ('create', 'rebuild' or 'undeclared'),
+        'collection', 'name' and the declared 'spec' (None for undeclared indexes)
+    """
+    changes = []
+    for collection, collection_specs in specs.items():
+        live = await AsyncMongoClient.get_index_information(database, collection)
+        declared = set()
+        for spec in collection_specs:
+            declared.add(spec["name"])
+            current = live.get(spec["name"])
+            if current is None:
+                changes.append({"action": "create", "collection": collection, "name": spec["name"], "spec": spec})
+            elif _normalize(current["key"], current) != _normalize(spec["keys"], spec):
+                changes.append({"action": "rebuild", "collection": collection, "name": spec["name"], "spec": spec})
+        for name in live:
+            if name != "_id_" and name not in declared:
+                changes.append({"action": "undeclared", "collection": collection, "name": name, "spec": None})
+    return changes
+
+async def reconcile_indexes(
+    specs: Dict[str, List[Dict[str, Any]]] = INDEX_SPECS,
+    database: str = MongoConfig.NEWS_DATABASE,
+    prune: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Create missing indexes and rebuild the ones whose definition changed.
+    Undeclared indexes are only dropped when `prune` is True.
+
+    Returns:
+        The changes that were applied
+    """
+    applied = []
+    for change in await diff_indexes(specs, database):
+        collection, name, spec = change["collection"], change["name"], change["spec"]
+        if change["action"] == "undeclared":
+            if prune and await AsyncMongoClient.drop_index(database, collection, name):
+                print(f"Index {collection}.{name}: {APPLIED_ACTIONS[change['action']]}")
+                applied.append(change)
+            continue
+        if change["action"] == "rebuild":
+            await AsyncMongoClient.drop_index(database, collection, name)
+        created = await AsyncMongoClient.create_index(
+            database, collection, spec["keys"], name=name, **_index_options(spec)
+        )
+        if created:
+            print(f"Index {collection}.{name}: {APPLIED_ACTIONS[change['action']]}")
+            applied.append(change)
+        else:
+            print(f"Index {collection}.{name}: failed to {change['action']}")
+    return applied
+
+def _supports(index_keys: List[Tuple[str, Any]], shape: Tuple[str, ...]) -> bool:
+    """Whether an index with these keys supports a query shape (the shape is a key prefix)."""
+    if shape == TEXT_SHAPE:
+        return _is_text_index(index_keys)
+    fields = tuple(field for field, _ in index_keys)
+    return fields[:len(shape)] == shape
+
+def check_query_shapes(
+    specs: Dict[str, List[Dict[str, Any]]] = INDEX_SPECS,
+    shapes: Dict[str, Tuple[str, Tuple[str, ...]]] = QUERY_SHAPES,
+    live: Optional[Dict[str, Dict[str, Dict]]] = None
+) -> None:
+    """
+    Check that every query shape is supported by an index.
+
+    Args:
+        specs: Declared indexes per collection
+        shapes: Query shapes to check
+        live: Live index information per collection; the declared specs are used if None
+
+    Raises:
+        MissingIndexError: Listing every query shape without a supporting index
+    """
+    missing = []
+    for query_name, (collection, shape) in shapes.items():
+        if live is not None:
+            index_keys = [info["key"] for info in live.get(collection, {}).values()]
+        else:
+            index_keys = [spec["keys"] for spec in specs.get(collection, [])] + [[("_id", 1)]]
+        if not any(_supports(keys, shape) for keys in index_keys):
+            missing.append(f"{query_name} on {collection} {shape}")
+    if missing:
+        raise MissingIndexError("No index supports these query shapes: " + "; ".join(missing))
+
+async def check_live_query_shapes(
+    shapes: Dict[str, Tuple[str, Tuple[str, ...]]] = QUERY_SHAPES,
+    database: str = MongoConfig.NEWS_DATABASE
+) -> None:
+    """Check the query shapes against the live indexes. See check_query_shapes."""
+    live = {}
+    for collection in {collection for collection, _ in shapes.values()}:
+        live[collection] = await AsyncMongoClient.get_index_information(database, collection)
+    check_query_shapes(shapes=shapes, live=live)
+
+if __name__ == "__main__":
+    commands = ("diff", "apply", "check")
+    if len(sys.argv) < 2 or sys.argv[1] not in commands:
+        print(f"Usage: python -m app.indexes <{'|'.join(commands)}> [--prune]")
+        sys.exit(1)
+
+    async def main(command: str, prune: bool) -> int:
+        AsyncMongoClient.connect_to_mongo()
+        try:
+            if command == "diff":
+                changes = await diff_indexes()
+                for change in changes:
+                    print(f"{change['action']:>10}  {change['collection']}.{change['name']}")
+                print(f"{len(changes)} difference(s)")
+            elif command == "apply":
+                applied = await reconcile_indexes(prune=prune)
+                print(f"{len(applied)} change(s) applied")
+            else:
+                await check_live_query_shapes()
+                print("All query shapes are supported by an index")
+        except MissingIndexError as e:
+            print(f"Error: {e}")
+            return 1
+        finally:
+            AsyncMongoClient.close_mongo_connection()
+        return 0
+
+    sys.exit(asyncio.run(main(sys.argv[1], "--prune" in sys.argv[2:])))
+
+    # To run this file as a script:
+    # python -m app.indexes diff
@@ -0,0 +1,426 @@
+"""
+Durable job queue for the ingest pipeline's crawl/enrich work.
+
+Jobs are stored in a MongoDB collection, or in a local SQLite file when MongoDB is
+not available, so a crash or restart never loses the state of a batch. Workers
+claim jobs with a lease; a job whose worker dies becomes claimable again once the
+lease expires. Failed jobs are retried with exponential backoff and moved to the
+dead-letter state after too many attempts. Enqueueing and completing are idempotent,
+and several worker processes can drain the same queue in parallel.
+
+Job statuses: pending -> leased -> done, or back to pending (retry), or dead.
+
+Usage:
+    python -m app.jobs stats          # number of jobs in each status
+    python -m app.jobs work           # drain the queue in this process
+    python -m app.jobs requeue-dead   # give dead jobs a fresh set of attempts
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import sqlite3
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from bson import json_util
+from pymongo import UpdateOne
+
+from .mongo import AsyncMongoClient
+from .config import MongoConfig, JobQueueConfig
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+class JobQueueError(Exception):
+    """Raised when jobs could not be queued."""
+    pass
+
+def default_worker_id() -> str:
+    """Identify the worker process holding a lease."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds before the next attempt of a job that failed `attempts` times, with jitter."""
+    delay = min(JobQueueConfig.BACKOFF_MAX, JobQueueConfig.BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+class MongoJobQueue:
+    """Job queue stored in a MongoDB collection."""
+
+    def __init__(
+        self,
+        database: str = MongoConfig.NEWS_DATABASE,
+        collection: str = MongoConfig.JOBS_COLLECTION,
+        lease_seconds: float = JobQueueConfig.LEASE_SECONDS,
+        max_attempts: int = JobQueueConfig.MAX_ATTEMPTS
+    ):
+        self.database = database
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    async def enqueue_many(self, kind: str, jobs: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Add jobs given as (job_id, payload). Jobs whose ID is already queued (in any
+        status) are left untouched. Returns the number of new jobs.
+
+        Raises:
+            JobQueueError: If some of the jobs could not be stored
+        """
+        now = datetime.utcnow()
+        documents = [{
+            "_id": job_id,
+            "kind": kind,
+            "payload": payload,
+            "status": PENDING,
+            "attempts": 0,
+            "available_at": now,
+            "created_at": now,
+            "updated_at": now,
+        } for job_id, payload in jobs]
+        if not documents:
+            return 0
+        # Insert-only upserts keep enqueueing idempotent
+        operations = [
+            UpdateOne({"_id": document["_id"]}, {"$setOnInsert": document}, upsert=True)
+            for document in documents
+        ]
+        summary = await AsyncMongoClient.bulk_write(self.database, self.collection, operations, ordered=False)
+        if summary["errors"]:
+            error = summary["errors"][0]
+            raise JobQueueError(
+                f"{len(summary['errors'])} of {len(documents)} jobs not queued, "
+                f"first error on {documents[error['index']]['_id']}: {error['message']}"
+            )
+        return summary["upserted_count"]
+
+    async def claim(self, kind: str, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next available job to a worker, None if there is none."""
+        now = datetime.utcnow()
+        return await AsyncMongoClient.find_one_and_update(
+            self.database,
+            self.collection,
+            {"kind": kind, "$or": [
+                {"status": PENDING, "available_at": {"$lte": now}},
+                {"status": LEASED, "lease_expires_at": {"$lte": now}},
+            ]},
+            {
+                "$set": {
+                    "status": LEASED,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", 1)]
+        )
+
+    async def complete_many(self, job_ids: List[str], worker_id: str) -> int:
+        """Mark jobs leased to this worker as done. Returns the number of jobs completed."""
+        if not job_ids:
+            return 0
+        now = datetime.utcnow()
+        return await AsyncMongoClient.update_many(
+            self.database,
+            self.collection,
+            {"_id": {"$in": list(job_ids)}, "status": LEASED, "lease_owner": worker_id},
+            {"$set": {"status": DONE, "completed_at": now, "updated_at": now},
+             "$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        )
+
+    async def fail(self, job: Dict[str, Any], worker_id: str, error: str) -> str:
+        """
+        Record a failed attempt: schedule a retry with backoff, or move the job to the
+        dead-letter state once it has used all its attempts. Returns the new status.
+        """
+        now = datetime.utcnow()
+        status = DEAD if job["attempts"] >= self.max_attempts else PENDING
+        update = {"status": status, "last_error": error, "updated_at": now}
+        if status == PENDING:
+            update["available_at"] = now + timedelta(seconds=backoff_delay(job["attempts"]))
+        await AsyncMongoClient.update_many(
+            self.database,
+            self.collection,
+            {"_id": job["_id"], "status": LEASED, "lease_owner": worker_id},
+            {"$set": update, "$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        )
+        return status
+
+    async def requeue_dead(self, kind: Optional[str] = None) -> int:
+        """Give dead jobs a fresh set of attempts. Returns the number of jobs requeued."""
+        query = {"status": DEAD}
+        if kind:
+            query["kind"] = kind
+        now = datetime.utcnow()
+        return await AsyncMongoClient.update_many(
+            self.database,
+            self.collection,
+            query,
+            {"$set": {"status": PENDING, "attempts": 0, "available_at": now, "updated_at": now}}
+        )
+
+    async def stats(self) -> Dict[str, int]:
+        """Number of jobs in each status."""
+        counts = await AsyncMongoClient.aggregate(
+            self.database,
+            self.collection,
+            [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        )
+        return {count["id"]: count["count"] for count in counts}
+
+class SqliteJobQueue:
+    """
+    Job queue stored in a local SQLite file, used when MongoDB is not available.
+    Claims run in an IMMEDIATE transaction, so worker processes on the same host
+    can share the file.
+    """
+
+    def __init__(
+        self,
+        path: str = JobQueueConfig.LOCAL_PATH,
+        lease_seconds: float = JobQueueConfig.LEASE_SECONDS,
+        max_attempts: int = JobQueueConfig.MAX_ATTEMPTS
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL,"
+                " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " available_at REAL NOT NULL, lease_owner TEXT, lease_expires_at REAL,"
+                " last_error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL,"
+                " completed_at REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (kind, status, available_at)")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_completed ON jobs (status, completed_at)")
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Awaitable[Any]:
+        """Run fn with its own connection in a thread, keeping the event loop free."""
+        def run():
+            connection = self._connect()
+            try:
+                return fn(connection)
+            finally:
+                connection.close()
+        return asyncio.to_thread(run)
+
+    async def enqueue_many(self, kind: str, jobs: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """See MongoJobQueue.enqueue_many."""
+        now = time.time()
+        rows = [(job_id, kind, json_util.dumps(payload), PENDING, now, now, now) for job_id, payload in jobs]
+
+        def enqueue(connection):
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO jobs (id, kind, payload, status, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            return connection.total_changes - before
+        return await self._run(enqueue)
+
+    async def claim(self, kind: str, worker_id: str) -> Optional[Dict[str, Any]]:
+        """See MongoJobQueue.claim."""
+        def claim(connection):
+            now = time.time()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT * FROM jobs WHERE kind = ? AND ("
+                    " (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?))"
+                    " ORDER BY available_at LIMIT 1",
+                    (kind, PENDING, now, LEASED, now)
+                ).fetchone()
+                if row is None:
+                    connection.execute("COMMIT")
+                    return None
+                connection.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires_at = ?,"
+                    " attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (LEASED, worker_id, now + self.lease_seconds, now, row["id"])
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            job = dict(row)
+            job["_id"] = job.pop("id")
+            job["payload"] = json_util.loads(job["payload"])
+            job["attempts"] += 1
+            job["status"] = LEASED
+            job["lease_owner"] = worker_id
+            return job
+        return await self._run(claim)
+
+    async def complete_many(self, job_ids: List[str], worker_id: str) -> int:
+        """See MongoJobQueue.complete_many."""
+        if not job_ids:
+            return 0
+
+        def complete(connection):
+            now = time.time()
+            before = connection.total_changes
+            connection.executemany(
+                "UPDATE jobs SET status = ?, completed_at = ?, updated_at = ?,"
+                " lease_owner = NULL, lease_expires_at = NULL"
+                " WHERE id = ? AND status = ? AND lease_owner = ?",
+                [(DONE, now, now, job_id, LEASED, worker_id) for job_id in job_ids]
+            )
+            completed = connection.total_changes - before
+            # SQLite has no TTL index, drop the completed jobs past their retention here
+            connection.execute(
+                "DELETE FROM jobs WHERE status = ? AND completed_at < ?",
+                (DONE, now - JobQueueConfig.DONE_RETENTION)
+            )
+            return completed
+        return await self._run(complete)
+
+    async def fail(self, job: Dict[str, Any], worker_id: str, error: str) -> str:
+        """See MongoJobQueue.fail."""
+        status = DEAD if job["attempts"] >= self.max_attempts else PENDING
+
+        def fail(connection):
+            now = time.time()
+            available_at = now + backoff_delay(job["attempts"]) if status == PENDING else now
+            connection.execute(
+                "UPDATE jobs SET status = ?, last_error = ?, available_at = ?, updated_at = ?,"
+                " lease_owner = NULL, lease_expires_at = NULL"
+                " WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, error, available_at, now, job["_id"], LEASED, worker_id)
+            )
+        await self._run(fail)
+        return status
+
+    async def requeue_dead(self, kind: Optional[str] = None) -> int:
+        """See MongoJobQueue.requeue_dead."""
+        def requeue(connection):
+            now = time.time()
+            query = "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?"
+            params = [PENDING, now, now, DEAD]
+            if kind:
+                query += " AND kind = ?"
+                params.append(kind)
+            return connection.execute(query, params).rowcount
+        return await self._run(requeue)
+
+    async def stats(self) -> Dict[str, int]:
+        """See MongoJobQueue.stats."""
+        def stats(connection):
+            rows = connection.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+            return {row["status"]: row["count"] for row in rows}
+        return await self._run(stats)
+
+async def get_job_queue(backend: str = JobQueueConfig.BACKEND):
+    """
+    Get the configured job queue: "mongo", "local", or "auto" (MongoDB when it is
+    reachable, the local SQLite file otherwise).
+    """
+    if backend == "local":
+        return SqliteJobQueue()
+    if backend == "mongo":
+        return MongoJobQueue()
+    if await AsyncMongoClient.ping():
+        return MongoJobQueue()
+    print(f"MongoDB unreachable, using the local job queue at {JobQueueConfig.LOCAL_PATH}")
+    return SqliteJobQueue()
+
+async def run_worker(
+    queue,
+    kind: str,
+    handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+    worker_id: Optional[str] = None,
+    concurrency: int = 1,
+    complete_on_return: bool = True,
+    stop_when_empty: bool = True,
+    poll_interval: float = 5.0
+) -> int:
+    """
+    Claim and handle jobs of one kind until the queue has no available job.
+
+    Args:
+        queue: MongoJobQueue or SqliteJobQueue
+        kind: Kind of the jobs to handle
+        handler: Coroutine called with each claimed job; raising fails the attempt
+        worker_id: Lease owner, default_worker_id() if None
+        concurrency: Number of jobs handled at the same time
+        complete_on_return: Complete a job as soon as its handler returns. Set it to
+            False when the handler completes its jobs later (e.g. after a buffered write).
+        stop_when_empty: Return once no job is available instead of polling for more
+        poll_interval: Seconds between polls when the queue is empty
+
+    Returns:
+        Number of jobs handled (successfully or not)
+    """
+    worker_id = worker_id or default_worker_id()
+    handled = 0
+
+    async def work():
+        nonlocal handled
+        while True:
+            job = await queue.claim(kind, worker_id)
+            if job is None:
+                if stop_when_empty:
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+            handled += 1
+            try:
+                await handler(job)
+            except Exception as e:
+                status = await queue.fail(job, worker_id, str(e))
+                print(f"Job {job['_id']} failed (attempt {job['attempts']}, now {status}): {str(e)}")
+                continue
+            if complete_on_return:
+                await queue.complete_many([job["_id"]], worker_id)
+
+    await asyncio.gather(*(work() for _ in range(concurrency)))
+    return handled
+
+if __name__ == "__main__":
+    commands = ("stats", "work", "requeue-dead")
+    if len(sys.argv) != 2 or sys.argv[1] not in commands:
+        print(f"Usage: python -m app.jobs <{'|'.join(commands)}>")
+        sys.exit(1)
+
+    async def main(command: str):
+        try:
+            queue = await get_job_queue()
+            if command == "stats":
+                print(json.dumps(await queue.stats(), indent=4))
+            elif command == "requeue-dead":
+                print(f"Requeued {await queue.requeue_dead()} dead jobs")
+            else:
+                from .news_control import NewsController
+                from .news_channels.news_channel_utils.straight_times_utils import process_enrich_jobs
+                try:
+                    print(json.dumps(await process_enrich_jobs(queue), indent=4))
+                finally:
+                    await NewsController.shutdown()
+        finally:
+            AsyncMongoClient.close_mongo_connection()
+
+    asyncio.run(main(sys.argv[1]))
+
+    # To run this file as a script:
+    # python -m app.jobs stats
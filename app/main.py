@@ -1,8 +1,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routers import news
-from .mongo import MongoClient
+from .mongo import AsyncMongoClient
 from .config import Settings
+from .indexes import check_query_shapes, reconcile_indexes
+from .http_client import HttpClient
+from .cache import watch_news_inserts
+import asyncio
 
 app = FastAPI(
     title=Settings.PROJECT_NAME,
@@ -21,11 +25,36 @@ app.add_middleware(
 
 @app.on_event("startup")
 def startup_db_client():
-    MongoClient.connect_to_mongo()
+    AsyncMongoClient.connect_to_mongo()
+
+@app.on_event("startup")
+async def startup_db_indexes():
+    # Refuse to start if a route query has no index, then create the missing ones
+    check_query_shapes()
+    await reconcile_indexes()
+
+@app.on_event("startup")
+async def startup_http_client():
+    await HttpClient.start()
+
+@app.on_event("startup")
+async def startup_cache_invalidation():
+    if Settings.cache.NEWS_CACHE_WATCH_CHANGES:
+        app.state.cache_watcher = asyncio.create_task(watch_news_inserts())
+
+@app.on_event("shutdown")
+async def shutdown_cache_invalidation():
+    watcher = getattr(app.state, "cache_watcher", None)
+    if watcher is not None:
+        watcher.cancel()
 
 @app.on_event("shutdown")
 def shutdown_db_client():
-    MongoClient.close_mongo_connection()
+    AsyncMongoClient.close_mongo_connection()
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await HttpClient.close()
 
 # Include routers
 app.include_router(news.router)
@@ -0,0 +1,169 @@
+"""
+One-off data migrations for the news collection.
+
+Usage:
+    python -m app.migrations <migration_name>
+"""
+import sys
+import asyncio
+
+from .mongo import AsyncMongoClient
+from .config import MongoConfig
+from pymongo import UpdateOne
+
+from .indexes import reconcile_indexes
+from .category_stats import rebuild_category_stats
+from .normalization import NORMALIZATION_VERSION, normalized_fields
+from .news_channels.news_channel_utils.dedup import set_missing_dedup_keys
+from .news_channels.news_channel_utils.near_duplicates import SIMHASH_FIELD, simhash_fields
+from .news_channels.news_channel_utils.related_articles import (
+    RELATED_TERMS_FIELD, TERM_FIELD_WEIGHTS, related_term_fields, update_related_articles
+)
+
+async def backfill_dedup_keys() -> int:
+    """
+    Set the deduplication key on news documents stored before it existed (the ingest
+    also does it on its first cycle), then create the unique index on it.
+
+    Returns:
+        Number of documents updated
+    """
+    updated = await set_missing_dedup_keys()
+    await reconcile_indexes()
+    return updated
+
+async def backfill_normalized_fields() -> int:
+    """
+    Store the normalized display fields (clean description, canonical category,
+    published_at) on news documents stored before, or with an older version of,
+    the ingest-time normalization.
+
+    Returns:
+        Number of documents updated
+    """
+    documents = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        {"$or": [
+            {"normalized_version": {"$exists": False}},
+            {"normalized_version": {"$lt": NORMALIZATION_VERSION}},
+        ]},
+        projection={"description": 1, "category": 1, "pubDate": 1},
+        limit=0
+    )
+    operations = [
+        UpdateOne({"_id": document["_id"]}, {"$set": normalized_fields(document)})
+        for document in documents
+    ]
+    if not operations:
+        return 0
+    summary = await AsyncMongoClient.bulk_write(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        operations,
+        ordered=False
+    )
+    for error in summary["errors"]:
+        print(f"Error normalizing document {documents[error['index']]['_id']}: {error['message']}")
+    return summary["modified_count"]
+
+async def backfill_simhashes() -> int:
+    """
+    Store the near-duplicate SimHash fields on news documents stored before they existed,
+    so new feed items can be matched against them.
+
+    Returns:
+        Number of documents updated
+    """
+    documents = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        {SIMHASH_FIELD: {"$exists": False}},
+        projection={"title": 1, "description": 1},
+        limit=0
+    )
+    operations = []
+    document_ids = []
+    for document in documents:
+        fields = simhash_fields(document)
+        if fields:
+            operations.append(UpdateOne({"_id": document["_id"]}, {"$set": fields}))
+            document_ids.append(document["_id"])
+    if not operations:
+        return 0
+    summary = await AsyncMongoClient.bulk_write(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        operations,
+        ordered=False
+    )
+    for error in summary["errors"]:
+        print(f"Error hashing document {document_ids[error['index']]}: {error['message']}")
+    await reconcile_indexes()
+    return summary["modified_count"]
+
+async def backfill_related_articles() -> int:
+    """
+    Store the term vectors of news documents stored before they existed, then recompute
+    the related articles of all the recent articles.
+
+    Returns:
+        Number of documents given a term vector
+    """
+    documents = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        {RELATED_TERMS_FIELD: {"$exists": False}},
+        projection={field: 1 for field in TERM_FIELD_WEIGHTS},
+        limit=0
+    )
+    operations = []
+    document_ids = []
+    for document in documents:
+        fields = related_term_fields(document)
+        if fields:
+            operations.append(UpdateOne({"_id": document["_id"]}, {"$set": fields}))
+            document_ids.append(document["_id"])
+    modified_count = 0
+    if operations:
+        summary = await AsyncMongoClient.bulk_write(
+            MongoConfig.NEWS_DATABASE,
+            MongoConfig.NEWS_COLLECTION,
+            operations,
+            ordered=False
+        )
+        for error in summary["errors"]:
+            print(f"Error vectorizing document {document_ids[error['index']]}: {error['message']}")
+        modified_count = summary["modified_count"]
+    await update_related_articles(rebuild=True)
+    return modified_count
+
+MIGRATIONS = {
+    "dedup_keys": backfill_dedup_keys,
+    "normalize": backfill_normalized_fields,
+    "simhash": backfill_simhashes,
+    "related": backfill_related_articles,
+    "category_stats": rebuild_category_stats,
+}
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in MIGRATIONS:
+        print(f"Usage: python -m app.migrations <{'|'.join(MIGRATIONS)}>")
+        sys.exit(1)
+
+    async def main():
+        AsyncMongoClient.connect_to_mongo()
+        try:
+            count = await MIGRATIONS[sys.argv[1]]()
+            print(f"Migration '{sys.argv[1]}' updated {count} documents")
+        finally:
+            AsyncMongoClient.close_mongo_connection()
+
+    asyncio.run(main())
+
+    # To run this file as a script:
+    # python -m app.migrations dedup_keys
+    # python -m app.migrations normalize
+    # python -m app.migrations simhash
+    # python -m app.migrations related
+    # python -m app.migrations category_stats
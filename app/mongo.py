@@ -1,7 +1,71 @@
 from pymongo import MongoClient as PyMongoClient
+from pymongo import InsertOne, UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
 from typing import List, Dict, Any, Optional, Union
-from .config import Settings
+from .config import Settings, MongoConfig
+
+def _new_bulk_summary() -> Dict[str, Any]:
+    """Empty result of a bulk write."""
+    return {
+        "inserted_count": 0,
+        "matched_count": 0,
+        "modified_count": 0,
+        "upserted_count": 0,
+        "deleted_count": 0,
+        "unprocessed_count": 0,
+        "errors": [],
+    }
+
+def _add_bulk_batch_result(summary: Dict[str, Any], result: Dict[str, Any], offset: int) -> None:
+    """Add the raw result of one bulk write batch (bulk_api_result or BulkWriteError details)."""
+    for error in result.get("writeErrors", []):
+        summary["errors"].append({
+            "index": offset + error["index"],
+            "code": error.get("code"),
+            "message": error.get("errmsg"),
+        })
+    summary["inserted_count"] += result.get("nInserted", 0)
+    summary["matched_count"] += result.get("nMatched", 0)
+    summary["modified_count"] += result.get("nModified", 0)
+    summary["upserted_count"] += result.get("nUpserted", 0)
+    summary["deleted_count"] += result.get("nRemoved", 0)
+
+def _add_bulk_batch_failure(summary: Dict[str, Any], batch_size: int, offset: int, error: Exception) -> None:
+    """Report every operation of a batch that failed as a whole (e.g. a network error)."""
+    print(f"Error in bulk write: {str(error)}")
+    for i in range(batch_size):
+        summary["errors"].append({"index": offset + i, "code": None, "message": str(error)})
+
+def _bulk_should_stop(summary: Dict[str, Any], ordered: bool, total: int) -> bool:
+    """Whether an ordered bulk write has to stop, recording the operations left unattempted."""
+    if ordered and summary["errors"]:
+        processed = summary["errors"][-1]["index"] + 1
+        summary["unprocessed_count"] = total - processed
+        return True
+    return False
+
+def _inserted_ids(documents: List[Dict], summary: Dict[str, Any]) -> List[str]:
+    """IDs of the documents of an insert_many that were inserted."""
+    failed = {error["index"] for error in summary["errors"]}
+    attempted = len(documents) - summary["unprocessed_count"]
+    return [
+        str(documents[i]["_id"]) for i in range(attempted)
+        if i not in failed and "_id" in documents[i]
+    ]
+
+def _upsert_operations(documents: List[Dict], key_fields: Union[str, List[str]]) -> List[UpdateOne]:
+    """Upsert operations matching each document on its natural key."""
+    if isinstance(key_fields, str):
+        key_fields = [key_fields]
+    operations = []
+    for document in documents:
+        key = {field: document.get(field) for field in key_fields}
+        update_data = {k: v for k, v in document.items() if k != "_id"}
+        operations.append(UpdateOne(key, {"$set": update_data}, upsert=True))
+    return operations
 
 class MongoClient:
     client: PyMongoClient = None
@@ -56,7 +120,8 @@ class MongoClient:
         projection: Dict = None,
         skip: int = 0,
         limit: int = 100,
-        sort: List[tuple] = None
+        sort: List[tuple] = None,
+        raise_errors: bool = False
     ) -> List[Dict]:
         """
         Search documents in a collection.
@@ -68,6 +133,8 @@ class MongoClient:
             skip: Number of documents to skip
             limit: Maximum number of documents to return
             sort: List of (field, direction) tuples for sorting
+            raise_errors: Raise on errors instead of returning [], for callers that must
+                tell a failure from finding nothing
         """
         try:
             db = cls.client[database]
@@ -87,6 +154,8 @@ class MongoClient:
             
             return documents
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error searching collection: {str(e)}")
             return []
 
@@ -110,6 +179,120 @@ class MongoClient:
             print(f"Error inserting document: {str(e)}")
             return None
 
+    @classmethod
+    def _get_collection(
+        cls,
+        database: str,
+        collection: str,
+        write_concern: Optional[Dict[str, Any]] = None
+    ):
+        """Get a collection, optionally with a write concern such as {"w": "majority", "j": True}."""
+        coll = cls.client[database][collection]
+        if write_concern:
+            coll = coll.with_options(write_concern=WriteConcern(**write_concern))
+        return coll
+
+    @classmethod
+    def bulk_write(
+        cls,
+        database: str,
+        collection: str,
+        operations: List[Any],
+        ordered: bool = True,
+        batch_size: int = MongoConfig.BULK_BATCH_SIZE,
+        write_concern: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run write operations (InsertOne, UpdateOne, ReplaceOne, DeleteOne...) in batches.
+        Args:
+            database: Database name
+            collection: Collection name
+            operations: List of pymongo write operations
+            ordered: Stop at the first failed operation if True, otherwise run them all
+            batch_size: Maximum number of operations sent in one round-trip
+            write_concern: Write concern options, the collection default if None
+        Returns:
+            Dict with inserted/matched/modified/upserted/deleted counts, the number of
+            operations not attempted after an ordered failure, and a list of errors,
+            each with the index of the failed operation, its error code and message.
+        """
+        summary = _new_bulk_summary()
+        try:
+            coll = cls._get_collection(database, collection, write_concern)
+        except Exception as e:
+            _add_bulk_batch_failure(summary, len(operations), 0, e)
+            return summary
+
+        for offset in range(0, len(operations), batch_size):
+            batch = operations[offset:offset + batch_size]
+            try:
+                result = coll.bulk_write(batch, ordered=ordered)
+                # Unacknowledged writes (w=0) have no counts to report
+                _add_bulk_batch_result(summary, result.bulk_api_result if result.acknowledged else {}, offset)
+            except BulkWriteError as e:
+                _add_bulk_batch_result(summary, e.details, offset)
+            except Exception as e:
+                _add_bulk_batch_failure(summary, len(batch), offset, e)
+
+            if _bulk_should_stop(summary, ordered, len(operations)):
+                break
+        return summary
+
+    @classmethod
+    def insert_many(
+        cls,
+        database: str,
+        collection: str,
+        documents: List[Dict],
+        ordered: bool = False,
+        batch_size: int = MongoConfig.BULK_BATCH_SIZE,
+        write_concern: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Insert documents in batches.
+        Returns the bulk_write summary plus 'inserted_ids', the IDs of the documents
+        that were inserted. Failed documents are reported in 'errors' by their index
+        in `documents`.
+        """
+        summary = cls.bulk_write(
+            database,
+            collection,
+            [InsertOne(document) for document in documents],
+            ordered=ordered,
+            batch_size=batch_size,
+            write_concern=write_concern
+        )
+        summary["inserted_ids"] = _inserted_ids(documents, summary)
+        return summary
+
+    @classmethod
+    def bulk_upsert(
+        cls,
+        database: str,
+        collection: str,
+        documents: List[Dict],
+        key_fields: Union[str, List[str]],
+        ordered: bool = False,
+        batch_size: int = MongoConfig.BULK_BATCH_SIZE,
+        write_concern: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Insert or update documents matched on a natural key.
+        Args:
+            key_fields: Field (or fields) identifying a document, e.g. "dedup_key"
+        Returns:
+            The bulk_write summary. Failed documents are reported in 'errors' by
+            their index in `documents`.
+        """
+        return cls.bulk_write(
+            database,
+            collection,
+            _upsert_operations(documents, key_fields),
+            ordered=ordered,
+            batch_size=batch_size,
+            write_concern=write_concern
+        )
+
     @classmethod
     def update_document(
         cls,
@@ -133,6 +316,24 @@ class MongoClient:
             print(f"Error updating document: {str(e)}")
             return False
 
+    @classmethod
+    def upsert_document(
+        cls,
+        database: str,
+        collection: str,
+        query: Dict,
+        update_data: Dict
+    ) -> bool:
+        """Update the document matching the query, inserting it if it does not exist."""
+        try:
+            db = cls.client[database]
+            coll = db[collection]
+            result = coll.update_one(query, {"$set": update_data}, upsert=True)
+            return result.matched_count > 0 or result.upserted_id is not None
+        except Exception as e:
+            print(f"Error upserting document: {str(e)}")
+            return False
+
     @classmethod
     def delete_document(
         cls,
@@ -199,7 +400,8 @@ class MongoClient:
         database: str,
         collection: str,
         keys: Union[str, List[tuple]],
-        unique: bool = False
+        unique: bool = False,
+        **options
     ) -> str:
         """
         Create an index on a collection.
@@ -208,11 +410,465 @@ class MongoClient:
             collection: Collection name
             keys: Either a single key name or list of (key, direction) tuples
             unique: Whether the index should be unique
+            options: Extra index options such as name, sparse or partialFilterExpression
+        """
+        try:
+            db = cls.client[database]
+            coll = db[collection]
+            return coll.create_index(keys, unique=unique, **options)
+        except Exception as e:
+            print(f"Error creating index: {str(e)}")
+            return None
+
+    @classmethod
+    def get_index_information(cls, database: str, collection: str) -> Dict[str, Dict]:
+        """Get the indexes of a collection, keyed by index name."""
+        try:
+            db = cls.client[database]
+            coll = db[collection]
+            return coll.index_information()
+        except Exception as e:
+            print(f"Error getting index information: {str(e)}")
+            return {}
+
+    @classmethod
+    def drop_index(cls, database: str, collection: str, name: str) -> bool:
+        """Drop an index by its name."""
+        try:
+            db = cls.client[database]
+            coll = db[collection]
+            coll.drop_index(name)
+            return True
+        except Exception as e:
+            print(f"Error dropping index: {str(e)}")
+            return False
+
+    @classmethod
+    def ping(cls) -> bool:
+        """Check that the MongoDB server is reachable."""
+        try:
+            cls.client.admin.command("ping")
+            return True
+        except Exception as e:
+            print(f"Error pinging MongoDB: {str(e)}")
+            return False
+
+    @classmethod
+    def find_one_and_update(
+        cls,
+        database: str,
+        collection: str,
+        query: Dict,
+        update: Dict,
+        sort: List[tuple] = None,
+        upsert: bool = False
+    ) -> Optional[Dict]:
+        """
+        Atomically update the first document matching the query (in `sort` order).
+        Returns the updated document, or None if no document matched.
         """
         try:
             db = cls.client[database]
             coll = db[collection]
-            return coll.create_index(keys, unique=unique)
+            return coll.find_one_and_update(
+                query, update, sort=sort, upsert=upsert, return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            print(f"Error in find_one_and_update: {str(e)}")
+            return None
+
+    @classmethod
+    def update_many(
+        cls,
+        database: str,
+        collection: str,
+        query: Dict,
+        update: Dict
+    ) -> int:
+        """Apply an update document (e.g. {"$set": {...}}) to every matching document. Returns the modified count."""
+        try:
+            db = cls.client[database]
+            coll = db[collection]
+            return coll.update_many(query, update).modified_count
+        except Exception as e:
+            print(f"Error updating documents: {str(e)}")
+            return 0
+
+
+class AsyncMongoClient:
+    """
+    asyncio-native counterpart of MongoClient, backed by Motor.
+    Every method has the same arguments and return value as its MongoClient
+    counterpart, but is awaited instead of blocking the event loop. The client
+    has its own connection pool and connects lazily on first use.
+    """
+    client: AsyncIOMotorClient = None
+
+    @classmethod
+    def connect_to_mongo(cls):
+        """Connect to MongoDB."""
+        cls.client = AsyncIOMotorClient(
+            Settings.mongo.MONGODB_URL,
+            maxPoolSize=MongoConfig.ASYNC_MAX_POOL_SIZE,
+            minPoolSize=MongoConfig.ASYNC_MIN_POOL_SIZE
+        )
+
+    @classmethod
+    def close_mongo_connection(cls):
+        """Close MongoDB connection."""
+        if cls.client:
+            cls.client.close()
+            cls.client = None
+
+    @classmethod
+    def _get_collection(
+        cls,
+        database: str,
+        collection: str,
+        write_concern: Optional[Dict[str, Any]] = None
+    ):
+        """Get a collection, connecting first if needed."""
+        if not cls.client:
+            cls.connect_to_mongo()
+        coll = cls.client[database][collection]
+        if write_concern:
+            coll = coll.with_options(write_concern=WriteConcern(**write_concern))
+        return coll
+
+    @classmethod
+    async def get_database_list(cls) -> List[str]:
+        """Get list of all databases."""
+        if not cls.client:
+            raise ConnectionError("MongoDB client not connected")
+        return await cls.client.list_database_names()
+
+    @classmethod
+    async def get_collection_list(cls, database: str) -> List[str]:
+        """Get list of all collections in a database."""
+        if not cls.client:
+            raise ConnectionError("MongoDB client not connected")
+        return await cls.client[database].list_collection_names()
+
+    @classmethod
+    async def get_document_by_id(cls, database: str, collection: str, doc_id: str) -> Optional[Dict]:
+        """Get a document by its ID."""
+        try:
+            coll = cls._get_collection(database, collection)
+            document = await coll.find_one({"_id": ObjectId(doc_id)})
+            if document:
+                document["id"] = str(document.pop("_id"))
+                return document
+            return None
+        except Exception as e:
+            print(f"Error getting document: {str(e)}")
+            return None
+
+    @classmethod
+    async def search_collection(
+        cls,
+        database: str,
+        collection: str,
+        query: Dict,
+        projection: Dict = None,
+        skip: int = 0,
+        limit: int = 100,
+        sort: List[tuple] = None,
+        raise_errors: bool = False
+    ) -> List[Dict]:
+        """Search documents in a collection. See MongoClient.search_collection."""
+        try:
+            coll = cls._get_collection(database, collection)
+
+            cursor = coll.find(query, projection)
+
+            if sort:
+                cursor = cursor.sort(sort)
+
+            cursor = cursor.skip(skip).limit(limit)
+            return await cursor.to_list(length=None)
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error searching collection: {str(e)}")
+            return []
+
+    @classmethod
+    async def insert_document(
+        cls,
+        database: str,
+        collection: str,
+        document: Dict
+    ) -> Optional[str]:
+        """
+        Insert a document into a collection.
+        Returns the ID of the inserted document if successful.
+        """
+        try:
+            coll = cls._get_collection(database, collection)
+            result = await coll.insert_one(document)
+            return str(result.inserted_id)
+        except Exception as e:
+            print(f"Error inserting document: {str(e)}")
+            return None
+
+    @classmethod
+    async def bulk_write(
+        cls,
+        database: str,
+        collection: str,
+        operations: List[Any],
+        ordered: bool = True,
+        batch_size: int = MongoConfig.BULK_BATCH_SIZE,
+        write_concern: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Run write operations in batches. See MongoClient.bulk_write."""
+        summary = _new_bulk_summary()
+        try:
+            coll = cls._get_collection(database, collection, write_concern)
+        except Exception as e:
+            _add_bulk_batch_failure(summary, len(operations), 0, e)
+            return summary
+
+        for offset in range(0, len(operations), batch_size):
+            batch = operations[offset:offset + batch_size]
+            try:
+                result = await coll.bulk_write(batch, ordered=ordered)
+                # Unacknowledged writes (w=0) have no counts to report
+                _add_bulk_batch_result(summary, result.bulk_api_result if result.acknowledged else {}, offset)
+            except BulkWriteError as e:
+                _add_bulk_batch_result(summary, e.details, offset)
+            except Exception as e:
+                _add_bulk_batch_failure(summary, len(batch), offset, e)
+
+            if _bulk_should_stop(summary, ordered, len(operations)):
+                break
+        return summary
+
+    @classmethod
+    async def insert_many(
+        cls,
+        database: str,
+        collection: str,
+        documents: List[Dict],
+        ordered: bool = False,
+        batch_size: int = MongoConfig.BULK_BATCH_SIZE,
+        write_concern: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Insert documents in batches. See MongoClient.insert_many."""
+        summary = await cls.bulk_write(
+            database,
+            collection,
+            [InsertOne(document) for document in documents],
+            ordered=ordered,
+            batch_size=batch_size,
+            write_concern=write_concern
+        )
+        summary["inserted_ids"] = _inserted_ids(documents, summary)
+        return summary
+
+    @classmethod
+    async def bulk_upsert(
+        cls,
+        database: str,
+        collection: str,
+        documents: List[Dict],
+        key_fields: Union[str, List[str]],
+        ordered: bool = False,
+        batch_size: int = MongoConfig.BULK_BATCH_SIZE,
+        write_concern: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Insert or update documents matched on a natural key. See MongoClient.bulk_upsert."""
+        return await cls.bulk_write(
+            database,
+            collection,
+            _upsert_operations(documents, key_fields),
+            ordered=ordered,
+            batch_size=batch_size,
+            write_concern=write_concern
+        )
+
+    @classmethod
+    async def update_document(
+        cls,
+        database: str,
+        collection: str,
+        doc_id: str,
+        update_data: Dict,
+        upsert: bool = False
+    ) -> bool:
+        """Update a document by its ID."""
+        try:
+            coll = cls._get_collection(database, collection)
+            result = await coll.update_one(
+                {"_id": ObjectId(doc_id)},
+                {"$set": update_data},
+                upsert=upsert
+            )
+            return result.modified_count > 0 or (upsert and result.upserted_id)
+        except Exception as e:
+            print(f"Error updating document: {str(e)}")
+            return False
+
+    @classmethod
+    async def upsert_document(
+        cls,
+        database: str,
+        collection: str,
+        query: Dict,
+        update_data: Dict
+    ) -> bool:
+        """Update the document matching the query, inserting it if it does not exist."""
+        try:
+            coll = cls._get_collection(database, collection)
+            result = await coll.update_one(query, {"$set": update_data}, upsert=True)
+            return result.matched_count > 0 or result.upserted_id is not None
+        except Exception as e:
+            print(f"Error upserting document: {str(e)}")
+            return False
+
+    @classmethod
+    async def delete_document(
+        cls,
+        database: str,
+        collection: str,
+        doc_id: str
+    ) -> bool:
+        """Delete a document by its ID."""
+        try:
+            coll = cls._get_collection(database, collection)
+            result = await coll.delete_one({"_id": ObjectId(doc_id)})
+            return result.deleted_count > 0
+        except Exception as e:
+            print(f"Error deleting document: {str(e)}")
+            return False
+
+    @classmethod
+    async def aggregate(
+        cls,
+        database: str,
+        collection: str,
+        pipeline: List[Dict]
+    ) -> List[Dict]:
+        """Perform an aggregation pipeline operation. See MongoClient.aggregate."""
+        try:
+            coll = cls._get_collection(database, collection)
+            documents = []
+            async for doc in coll.aggregate(pipeline):
+                if "_id" in doc:
+                    doc["id"] = str(doc.pop("_id"))
+                documents.append(doc)
+            return documents
+        except Exception as e:
+            print(f"Error in aggregation: {str(e)}")
+            return []
+
+    @classmethod
+    async def count_documents(
+        cls,
+        database: str,
+        collection: str,
+        query: Dict = {}
+    ) -> int:
+        """Count documents in a collection matching the query."""
+        try:
+            coll = cls._get_collection(database, collection)
+            return await coll.count_documents(query)
+        except Exception as e:
+            print(f"Error counting documents: {str(e)}")
+            return 0
+
+    @classmethod
+    async def create_index(
+        cls,
+        database: str,
+        collection: str,
+        keys: Union[str, List[tuple]],
+        unique: bool = False,
+        **options
+    ) -> str:
+        """Create an index on a collection. See MongoClient.create_index."""
+        try:
+            coll = cls._get_collection(database, collection)
+            return await coll.create_index(keys, unique=unique, **options)
         except Exception as e:
             print(f"Error creating index: {str(e)}")
             return None
+
+    @classmethod
+    async def get_index_information(cls, database: str, collection: str) -> Dict[str, Dict]:
+        """Get the indexes of a collection, keyed by index name."""
+        try:
+            coll = cls._get_collection(database, collection)
+            return await coll.index_information()
+        except Exception as e:
+            print(f"Error getting index information: {str(e)}")
+            return {}
+
+    @classmethod
+    async def drop_index(cls, database: str, collection: str, name: str) -> bool:
+        """Drop an index by its name."""
+        try:
+            coll = cls._get_collection(database, collection)
+            await coll.drop_index(name)
+            return True
+        except Exception as e:
+            print(f"Error dropping index: {str(e)}")
+            return False
+
+    @classmethod
+    def watch(cls, database: str, collection: str, pipeline: List[Dict] = None, **options):
+        """
+        Open a change stream on a collection (requires a replica set).
+        Use it as `async with AsyncMongoClient.watch(...) as stream: async for change in stream`.
+        """
+        coll = cls._get_collection(database, collection)
+        return coll.watch(pipeline or [], **options)
+
+    @classmethod
+    async def ping(cls) -> bool:
+        """Check that the MongoDB server is reachable."""
+        try:
+            if not cls.client:
+                cls.connect_to_mongo()
+            await cls.client.admin.command("ping")
+            return True
+        except Exception as e:
+            print(f"Error pinging MongoDB: {str(e)}")
+            return False
+
+    @classmethod
+    async def find_one_and_update(
+        cls,
+        database: str,
+        collection: str,
+        query: Dict,
+        update: Dict,
+        sort: List[tuple] = None,
+        upsert: bool = False
+    ) -> Optional[Dict]:
+        """Atomically update the first matching document. See MongoClient.find_one_and_update."""
+        try:
+            coll = cls._get_collection(database, collection)
+            return await coll.find_one_and_update(
+                query, update, sort=sort, upsert=upsert, return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            print(f"Error in find_one_and_update: {str(e)}")
+            return None
+
+    @classmethod
+    async def update_many(
+        cls,
+        database: str,
+        collection: str,
+        query: Dict,
+        update: Dict
+    ) -> int:
+        """Apply an update document to every matching document. Returns the modified count."""
+        try:
+            coll = cls._get_collection(database, collection)
+            result = await coll.update_many(query, update)
+            return result.modified_count
+        except Exception as e:
+            print(f"Error updating documents: {str(e)}")
+            return 0
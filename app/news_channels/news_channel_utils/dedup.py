@@ -0,0 +1,120 @@
+"""
+Batch deduplication of feed items against the news collection.
+
+Items are keyed on their guid, or on their canonical link when the feed has no guid,
+and all the keys of a fetch cycle are resolved in a single indexed query. Documents
+stored before the keys existed get theirs before the first cycle of each process
+(ensure_dedup_keys), otherwise every item of the feeds would look new.
+"""
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from ...mongo import AsyncMongoClient
+from ...config import MongoConfig
+from ...normalization import canonical_link
+
+DEDUP_KEY_FIELD = "dedup_key"
+
+# Whether this process already keyed the documents stored without a dedup key
+_dedup_keys_checked = False
+
+def dedup_key(news_item: Dict[str, Any]) -> Optional[str]:
+    """Get the deduplication key of a feed item: its guid, or else its canonical link."""
+    guid = (news_item.get("guid") or "").strip()
+    if guid:
+        # Permalink guids are URLs, normalize them like links
+        return canonical_link(guid) if guid.startswith(("http://", "https://")) else guid
+    return canonical_link(news_item.get("link"))
+
+async def set_missing_dedup_keys() -> int:
+    """
+    Set the deduplication key on the stored documents that have none, in one bulk write.
+    Of several documents with the same key (older runs could store an article twice),
+    only the first one gets it.
+
+    Returns:
+    - int: The number of documents updated.
+
+    Raises:
+    - Exception: If the documents cannot be read.
+    """
+    documents = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        {DEDUP_KEY_FIELD: {"$exists": False}},
+        projection={"guid": 1, "link": 1},
+        limit=0,
+        raise_errors=True
+    )
+    operations = []
+    document_ids = []
+    seen = set()
+    for document in documents:
+        key = dedup_key(document)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {DEDUP_KEY_FIELD: key}}))
+        document_ids.append(document["_id"])
+    if not operations:
+        return 0
+    summary = await AsyncMongoClient.bulk_write(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        operations,
+        ordered=False
+    )
+    for error in summary["errors"]:
+        # A duplicate key error means a keyed document already stores the same article
+        print(f"Error setting the dedup key of document {document_ids[error['index']]}: {error['message']}")
+    return summary["modified_count"]
+
+async def ensure_dedup_keys() -> None:
+    """Key the documents stored without a dedup key, once per process, before they are deduplicated against."""
+    global _dedup_keys_checked
+    if _dedup_keys_checked:
+        return
+    updated = await set_missing_dedup_keys()
+    if updated:
+        print(f"Set the dedup key of {updated} stored news items")
+    _dedup_keys_checked = True
+
+async def filter_unseen_items(news_items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop the feed items that are already stored, using one query for the whole batch.
+
+    Each returned item gets its 'dedup_key' set. Items that appear more than once in the
+    batch (the same article in several category feeds) are only returned once, the
+    first occurrence wins. Items without a guid or link are dropped.
+
+    Args:
+    - news_items (list): Feed items from a fetch cycle.
+
+    Returns:
+    - list: The items that are not in the news collection yet, in their original order.
+
+    Raises:
+    - Exception: If the lookup fails, rather than treating every item as new.
+    """
+    candidates = {}
+    for news_item in news_items:
+        key = dedup_key(news_item)
+        if key and key not in candidates:
+            news_item[DEDUP_KEY_FIELD] = key
+            candidates[key] = news_item
+
+    if not candidates:
+        return []
+
+    # Covered query: only the indexed key comes back, not the documents
+    existing = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        {DEDUP_KEY_FIELD: {"$in": list(candidates)}},
+        projection={"_id": 0, DEDUP_KEY_FIELD: 1},
+        limit=0,
+        raise_errors=True
+    )
+    seen = {doc[DEDUP_KEY_FIELD] for doc in existing}
+    return [news_item for key, news_item in candidates.items() if key not in seen]
@@ -0,0 +1,170 @@
+"""
+Persistent per-feed state used to skip feeds that have not changed since the last run.
+
+Each feed (and the OPML index) is stored in its own document keyed by URL, holding
+the validators needed for a conditional GET (ETag, Last-Modified) and the values used
+to detect unchanged content (lastBuildDate and a hash of the body). It also holds the
+feed's adaptive polling interval and the time it is next due.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from ...mongo import AsyncMongoClient
+from ...config import MongoConfig, SchedulerConfig
+from ...polling import adapt_interval, jittered
+
+class FeedStateStore:
+
+    @classmethod
+    async def load_all(cls, urls: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the stored state of several feeds in one query.
+
+        Args:
+        - urls (iterable): Feed URLs to load. Loads every stored feed when None.
+
+        Returns:
+        - dict: Feed URL mapped to its stored state.
+        """
+        query = {} if urls is None else {"_id": {"$in": list(urls)}}
+        states = await AsyncMongoClient.search_collection(
+            MongoConfig.NEWS_DATABASE,
+            MongoConfig.FEED_STATE_COLLECTION,
+            query,
+            limit=0
+        )
+        return {state["_id"]: state for state in states}
+
+    @classmethod
+    async def get(cls, url: str) -> Optional[Dict[str, Any]]:
+        """Load the stored state of a single feed."""
+        states = await cls.load_all([url])
+        return states.get(url)
+
+    @classmethod
+    def conditional_headers(cls, state: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build the If-None-Match / If-Modified-Since headers for a stored state."""
+        headers = {}
+        if not state:
+            return headers
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    @classmethod
+    def from_response(
+        cls,
+        url: str,
+        response,
+        content: Optional[bytes] = None,
+        previous: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the new state of a feed from an HTTP response.
+
+        Args:
+        - url (str): The feed URL.
+        - response: The aiohttp response (200 or 304).
+        - content (bytes): The response body, None for a 304.
+        - previous (dict): The stored state, whose values are kept when the response has none.
+
+        Returns:
+        - dict: The new state, ready to be saved.
+        """
+        previous = previous or {}
+        now = datetime.utcnow()
+        state = {
+            "_id": url,
+            "etag": response.headers.get("ETag") or previous.get("etag"),
+            "last_modified": response.headers.get("Last-Modified") or previous.get("last_modified"),
+            "last_build_date": previous.get("last_build_date"),
+            "content_hash": previous.get("content_hash"),
+            "changed_at": previous.get("changed_at"),
+            "checked_at": now,
+            "poll_interval": previous.get("poll_interval"),
+            "next_poll_at": previous.get("next_poll_at"),
+        }
+        if content is not None:
+            state["content_hash"] = hashlib.sha256(content).hexdigest()
+        return state
+
+    @classmethod
+    def mark_changed(cls, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Record that the feed had new content at the time it was checked."""
+        state["changed_at"] = state["checked_at"]
+        return state
+
+    @classmethod
+    def is_due(cls, state: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> bool:
+        """Whether a feed should be fetched now, according to its adaptive schedule."""
+        if not state or not state.get("next_poll_at"):
+            return True
+        return state["next_poll_at"] <= (now or datetime.utcnow())
+
+    @classmethod
+    def schedule_next(cls, state: Dict[str, Any], new_items: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Adapt the polling interval of a feed after it was checked and set when it is next due.
+
+        Args:
+        - state (dict): The new state of the feed.
+        - new_items (int): Number of items of the feed that were not stored yet. When None,
+          whether the feed content changed (lastBuildDate or body hash) is used instead.
+
+        Returns:
+        - dict: The state, updated in place.
+        """
+        if new_items is None:
+            changed = state.get("changed_at") is not None and state.get("changed_at") == state.get("checked_at")
+        else:
+            changed = new_items > 0
+        interval = adapt_interval(
+            state.get("poll_interval"),
+            changed,
+            SchedulerConfig.FEED_MIN_INTERVAL,
+            SchedulerConfig.FEED_MAX_INTERVAL,
+            SchedulerConfig.FEED_DEFAULT_INTERVAL
+        )
+        state["poll_interval"] = interval
+        state["next_poll_at"] = state["checked_at"] + timedelta(seconds=jittered(interval))
+        return state
+
+    @classmethod
+    def is_unchanged(
+        cls,
+        previous: Optional[Dict[str, Any]],
+        state: Dict[str, Any],
+        field: str
+    ) -> bool:
+        """Whether `field` is set and identical in the stored and the new state."""
+        if not previous or not state.get(field):
+            return False
+        return previous.get(field) == state[field]
+
+    @classmethod
+    async def save(cls, state: Dict[str, Any]) -> bool:
+        """Save the state of a single feed."""
+        update_data = {key: value for key, value in state.items() if key != "_id"}
+        return await AsyncMongoClient.upsert_document(
+            MongoConfig.NEWS_DATABASE,
+            MongoConfig.FEED_STATE_COLLECTION,
+            {"_id": state["_id"]},
+            update_data
+        )
+
+    @classmethod
+    async def save_many(cls, states: List[Dict[str, Any]]) -> None:
+        """Save the state of several feeds in one round-trip."""
+        if not states:
+            return
+        summary = await AsyncMongoClient.bulk_upsert(
+            MongoConfig.NEWS_DATABASE,
+            MongoConfig.FEED_STATE_COLLECTION,
+            states,
+            "_id"
+        )
+        for error in summary["errors"]:
+            print(f"Error saving feed state {states[error['index']]['_id']}: {error['message']}")
@@ -0,0 +1,167 @@
+"""
+Near-duplicate detection of feed items with SimHash.
+
+Each item gets a 64-bit SimHash of the words of its normalized title and description,
+stored on the news document together with its bands (the hash split in NEAR_DUP_BANDS
+parts). Two items whose hashes differ in fewer bits than there are bands
+share at least one band, so candidates are found with one indexed query on the bands
+and then confirmed on the Hamming distance.
+
+Near-duplicates (syndicated copies, lightly edited headlines, the same story under
+another guid) are not crawled: they are stored linked to their canonical article, with its
+enrichment copied.
+"""
+import re
+import hashlib
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from ...mongo import AsyncMongoClient
+from ...config import MongoConfig, IngestConfig
+from ...normalization import clean_html
+from .dedup import DEDUP_KEY_FIELD
+
+SIMHASH_FIELD = "simhash"
+SIMHASH_BANDS_FIELD = "simhash_bands"
+DUPLICATE_OF_FIELD = "duplicate_of"
+# Dedup key of the canonical item, set on queued near-duplicates until they are linked
+NEAR_DUPLICATE_KEY = "near_duplicate_of"
+
+HASH_BITS = 64
+# Single words: on texts as short as a title and description, longer shingles make a
+# one-word edit move the hash further than the distance between unrelated stories
+SHINGLE_SIZE = 1
+WORD_PATTERN = re.compile(r"\w+")
+
+# Fields of a stored article that belong to the feed item rather than to its enrichment
+ITEM_FIELDS = {
+    "_id", "title", "link", "description", "guid", "guid_is_permalink", "pubDate", "source",
+    "source_url", "category", "published_at", "normalized_version", DEDUP_KEY_FIELD,
+    SIMHASH_FIELD, SIMHASH_BANDS_FIELD, DUPLICATE_OF_FIELD, NEAR_DUPLICATE_KEY, "llm_input",
+    # Computed for each article, see related_articles.py
+    "related", "related_terms",
+}
+
+def _words(news_item: Dict[str, Any]) -> List[str]:
+    text = f"{clean_html(news_item.get('title'))} {clean_html(news_item.get('description'))}"
+    return WORD_PATTERN.findall(text.lower())
+
+def simhash(words: List[str], shingle_size: int = SHINGLE_SIZE) -> int:
+    """64-bit SimHash of the word shingles of a text, each weighted by its frequency."""
+    weights = [0] * HASH_BITS
+    for i in range(max(len(words) - shingle_size + 1, 1)):
+        shingle = " ".join(words[i:i + shingle_size])
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(HASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(HASH_BITS) if weights[bit] > 0)
+
+def simhash_bands(value: int, bands: int = IngestConfig.NEAR_DUP_BANDS) -> List[str]:
+    """The bands of a SimHash, each tagged with its position."""
+    width = HASH_BITS // bands
+    mask = (1 << width) - 1
+    return [f"{band}:{value >> (band * width) & mask:x}" for band in range(bands)]
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def _to_int64(value: int) -> int:
+    """MongoDB stores signed 64-bit integers."""
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+def _from_int64(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+def simhash_fields(news_item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The stored SimHash fields of a news item, empty when its title and description are
+    too short to compare reliably.
+    """
+    words = _words(news_item)
+    if len(words) < IngestConfig.NEAR_DUP_MIN_WORDS:
+        return {}
+    value = simhash(words)
+    return {SIMHASH_FIELD: _to_int64(value), SIMHASH_BANDS_FIELD: simhash_bands(value)}
+
+def _is_near(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Whether two items are near-duplicates: close hashes and publication dates."""
+    if hamming_distance(_from_int64(a[SIMHASH_FIELD]), _from_int64(b[SIMHASH_FIELD])) > IngestConfig.NEAR_DUP_MAX_DISTANCE:
+        return False
+    if a.get("published_at") and b.get("published_at"):
+        return abs(a["published_at"] - b["published_at"]) <= timedelta(days=IngestConfig.NEAR_DUP_WINDOW_DAYS)
+    return True
+
+async def mark_near_duplicates(news_items: List[Dict[str, Any]]) -> int:
+    """
+    Set the SimHash fields of new feed items and mark their near-duplicates, using one
+    query for the whole batch.
+
+    Items close to a stored article, or to an earlier item of the batch, get
+    'near_duplicate_of' set to the dedup key of that canonical item.
+
+    Args:
+    - news_items (list): New, normalized feed items, each with its 'dedup_key'.
+
+    Returns:
+    - int: The number of items marked as near-duplicates.
+    """
+    for news_item in news_items:
+        news_item.update(simhash_fields(news_item))
+    hashed = [news_item for news_item in news_items if SIMHASH_FIELD in news_item]
+    if not hashed:
+        return 0
+
+    bands = {band for news_item in hashed for band in news_item[SIMHASH_BANDS_FIELD]}
+    stored = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        {SIMHASH_BANDS_FIELD: {"$in": list(bands)}},
+        projection={DEDUP_KEY_FIELD: 1, SIMHASH_FIELD: 1, SIMHASH_BANDS_FIELD: 1, "published_at": 1},
+        limit=0
+    )
+    # Candidates by band: stored articles first, then the items of this batch as they are seen
+    buckets: Dict[str, List[Dict[str, Any]]] = {}
+    for candidate in stored:
+        for band in candidate.get(SIMHASH_BANDS_FIELD, []):
+            buckets.setdefault(band, []).append(candidate)
+
+    marked = 0
+    for news_item in hashed:
+        candidates = {id(candidate): candidate for band in news_item[SIMHASH_BANDS_FIELD]
+                      for candidate in buckets.get(band, [])}
+        canonical = next((candidate for candidate in candidates.values()
+                          if candidate.get(DEDUP_KEY_FIELD) and _is_near(news_item, candidate)), None)
+        if canonical is not None:
+            news_item[NEAR_DUPLICATE_KEY] = canonical[DEDUP_KEY_FIELD]
+            marked += 1
+            continue
+        for band in news_item[SIMHASH_BANDS_FIELD]:
+            buckets.setdefault(band, []).append(news_item)
+    return marked
+
+async def link_near_duplicate(news_item: Dict[str, Any], canonical_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Build the stored document of a near-duplicate from its canonical article.
+
+    Args:
+    - news_item (dict): The feed item of the near-duplicate.
+    - canonical_key (str): The dedup key of the canonical item.
+
+    Returns:
+    - dict: The feed item with the canonical article's enrichment and 'duplicate_of' set
+      to its ID, None if the canonical article is not stored (yet).
+    """
+    canonical = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        {DEDUP_KEY_FIELD: canonical_key},
+        limit=1
+    )
+    if not canonical:
+        return None
+    canonical = canonical[0]
+    enrichment = {key: value for key, value in canonical.items() if key not in ITEM_FIELDS}
+    # Link to the root article when the canonical one is itself a near-duplicate
+    root_id = canonical.get(DUPLICATE_OF_FIELD) or canonical["_id"]
+    linked = {key: value for key, value in news_item.items() if key != NEAR_DUPLICATE_KEY}
+    return {**linked, **enrichment, DUPLICATE_OF_FIELD: root_id}
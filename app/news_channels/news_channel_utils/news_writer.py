@@ -0,0 +1,88 @@
+"""
+Buffered writer used by the ingest pipelines to store enriched articles in bulk.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ...mongo import AsyncMongoClient
+from ...config import MongoConfig, IngestConfig
+from ...cache import invalidate_news_categories
+from ...category_stats import record_inserted
+
+# MongoDB error code for a unique index violation
+DUPLICATE_KEY_ERROR = 11000
+
+class NewsWriteBuffer:
+    """
+    Collects news documents and writes them with one unordered bulk insert per
+    `buffer_size` documents. Await flush() once the pipeline is done to write the rest.
+
+    `on_flushed` is awaited after each write with the documents that are now stored
+    (inserted, or already stored by a concurrent run) and the failures of that write.
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = IngestConfig.WRITE_BUFFER_SIZE,
+        database: str = MongoConfig.NEWS_DATABASE,
+        collection: str = MongoConfig.NEWS_COLLECTION,
+        write_concern: Optional[Dict[str, Any]] = None,
+        on_flushed: Optional[Callable[[List[Dict[str, Any]], List[Dict[str, Any]]], Awaitable[None]]] = None
+    ):
+        self.buffer_size = buffer_size
+        self.database = database
+        self.collection = collection
+        self.write_concern = write_concern
+        self.on_flushed = on_flushed
+        self._buffer: List[Dict[str, Any]] = []
+        self.inserted_count = 0
+        self.duplicate_count = 0
+        self.failed: List[Dict[str, Any]] = []
+
+    async def add(self, document: Dict[str, Any]) -> None:
+        """Buffer a document, flushing the buffer once it is full."""
+        self._buffer.append(document)
+        if len(self._buffer) >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self) -> List[Dict[str, Any]]:
+        """
+        Write the buffered documents.
+
+        Returns:
+        - list: The documents that were inserted.
+        """
+        if not self._buffer:
+            return []
+        documents, self._buffer = self._buffer, []
+        summary = await AsyncMongoClient.insert_many(
+            self.database,
+            self.collection,
+            documents,
+            ordered=False,
+            write_concern=self.write_concern
+        )
+        failed_indexes = set()
+        duplicates = []
+        failed = []
+        for error in summary["errors"]:
+            failed_indexes.add(error["index"])
+            document = documents[error["index"]]
+            if error["code"] == DUPLICATE_KEY_ERROR:
+                # Stored by a concurrent run in the meantime
+                self.duplicate_count += 1
+                duplicates.append(document)
+                continue
+            print(f"Error inserting news item '{document.get('title')}': {error['message']}")
+            failed.append({"document": document, "error": error})
+        self.failed.extend(failed)
+
+        self.inserted_count += summary["inserted_count"]
+        print(f"Flushed {summary['inserted_count']} of {len(documents)} news items to the database")
+        inserted = [document for i, document in enumerate(documents) if i not in failed_indexes]
+        if self.collection == MongoConfig.NEWS_COLLECTION:
+            await record_inserted(inserted)
+        # Cached responses of this process (other processes are notified by the change stream)
+        invalidate_news_categories(document.get("category") for document in inserted)
+        if self.on_flushed is not None:
+            await self.on_flushed(inserted + duplicates, failed)
+        return inserted
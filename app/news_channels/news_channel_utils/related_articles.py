@@ -0,0 +1,235 @@
+"""
+Related articles from hashed TF-IDF similarity.
+
+Each stored article gets a compact term vector at ingest time: the 32-bit hashes of
+the words of its title, keywords, summary, description and article text with their
+(field-weighted) counts, packed into one binary field. update_related_articles() loads
+the vectors of the recent articles into a NumPy matrix (TF-IDF weights folded into
+IngestConfig.RELATED_FEATURES signed hash buckets, rows L2-normalized), scores the new
+articles against all of them with one matrix product per block of rows, and stores the
+top neighbors on each document. Existing articles get the new ones merged into their
+lists, so serving /news/{id}/related is a single lookup by _id.
+
+NumPy is only imported by the batch job.
+"""
+import re
+import asyncio
+import hashlib
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from ...mongo import AsyncMongoClient
+from ...config import MongoConfig, IngestConfig
+from .near_duplicates import DUPLICATE_OF_FIELD
+
+RELATED_FIELD = "related"
+RELATED_TERMS_FIELD = "related_terms"
+
+# Text fields of an article and how much each occurrence of a word in them counts
+TERM_FIELD_WEIGHTS = {"title": 3, "keywords": 2, "summary": 1, "description": 1, "article": 1}
+WORD_PATTERN = re.compile(r"\w+")
+# Words shorter than this (and numbers) carry no topic
+MIN_WORD_CHARS = 3
+STOP_WORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how its
+    may new now old see two who did get got let say she too use that with have this will
+    your from they been were said what when which their there would could about after
+    also into more than them then these some only over such just most other very
+""".split())
+
+# Fields of the related articles stored with each neighbor, enough to list them
+NEIGHBOR_FIELDS = ("title", "category", "pubDate")
+# Rows of the similarity matrix computed at once
+SCORE_BLOCK_ROWS = 512
+
+def _term_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "little")
+
+def _texts(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [text for item in value for text in _texts(item)]
+    return []
+
+def term_vector(news_item: Dict[str, Any]) -> Dict[int, float]:
+    """Field-weighted counts of the words of an article, by word hash."""
+    counts: Dict[int, float] = {}
+    for field, weight in TERM_FIELD_WEIGHTS.items():
+        for text in _texts(news_item.get(field)):
+            for word in WORD_PATTERN.findall(text.lower()):
+                if len(word) < MIN_WORD_CHARS or word.isdigit() or word in STOP_WORDS:
+                    continue
+                term = _term_hash(word)
+                counts[term] = counts.get(term, 0) + weight
+    return counts
+
+def related_term_fields(news_item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The stored term vector of an article: the hashes (uint32) followed by the counts
+    (float32), empty when the article has no words to compare.
+    """
+    counts = term_vector(news_item)
+    if not counts:
+        return {}
+    return {RELATED_TERMS_FIELD: array("I", counts.keys()).tobytes() + array("f", counts.values()).tobytes()}
+
+def tfidf_matrix(vectors: Sequence[bytes], features: int = IngestConfig.RELATED_FEATURES):
+    """L2-normalized hashed TF-IDF rows of the stored term vectors."""
+    import numpy as np
+
+    decoded = []
+    for vector in vectors:
+        size = len(vector) // 8
+        decoded.append((np.frombuffer(vector, dtype=np.uint32, count=size),
+                        np.frombuffer(vector, dtype=np.float32, count=size, offset=size * 4)))
+    lengths = np.array([len(terms) for terms, _ in decoded])
+    rows = np.repeat(np.arange(len(decoded)), lengths)
+    terms = np.concatenate([terms for terms, _ in decoded]) if decoded else np.empty(0, np.uint32)
+    counts = np.concatenate([counts for _, counts in decoded]) if decoded else np.empty(0, np.float32)
+
+    # Each term appears once per vector, so its document frequency is its number of occurrences
+    _, term_index, document_frequency = np.unique(terms, return_inverse=True, return_counts=True)
+    idf = np.log((1 + len(decoded)) / (1 + document_frequency)) + 1
+    weights = (1 + np.log(np.maximum(counts, 1))) * idf[term_index]
+    # The top bit of the hash signs the term, so bucket collisions cancel out on average
+    signs = np.where(terms >> 31, -1.0, 1.0)
+
+    matrix = np.zeros((len(decoded), features), dtype=np.float32)
+    np.add.at(matrix, (rows, terms % features), (weights * signs).astype(np.float32))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+def top_neighbors(
+    matrix,
+    rows: Sequence[int],
+    columns: Sequence[int],
+    stories: Sequence[int],
+    top_k: int = IngestConfig.RELATED_TOP_K,
+    min_score: float = IngestConfig.RELATED_MIN_SCORE,
+) -> List[List[Tuple[int, float]]]:
+    """
+    The most similar articles of each row article among the column articles.
+
+    Args:
+    - matrix (numpy.ndarray): TF-IDF rows of all the articles, see tfidf_matrix().
+    - rows (list): Indexes of the articles to find neighbors for.
+    - columns (list): Indexes of the articles that can be neighbors.
+    - stories (list): Story of each article: the index of its canonical article for
+      near-duplicates, its own index otherwise. Articles of the same story are never
+      neighbors of each other.
+    - top_k (int): Maximum number of neighbors per article.
+    - min_score (float): Minimum cosine similarity of a neighbor.
+
+    Returns:
+    - list: For each row, its (column article index, score) pairs, best first.
+    """
+    import numpy as np
+
+    neighbors: List[List[Tuple[int, float]]] = [[] for _ in rows]
+    if not len(rows) or not len(columns) or top_k <= 0:
+        return neighbors
+    rows = np.asarray(rows)
+    columns = np.asarray(columns)
+    stories = np.asarray(stories)
+    column_vectors = matrix[columns].T
+    k = min(top_k, len(columns))
+
+    for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+        block = rows[start:start + SCORE_BLOCK_ROWS]
+        scores = matrix[block] @ column_vectors
+        scores[stories[block][:, None] == stories[columns][None, :]] = -1.0
+        # Unordered top k of each row, then sorted
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        for i in range(len(block)):
+            neighbors[start + i] = [
+                (int(columns[column]), float(score))
+                for column, score in zip(best[i], best_scores[i]) if score >= min_score
+            ]
+    return neighbors
+
+def _neighbor(document: Dict[str, Any], score: float) -> Dict[str, Any]:
+    return {"id": str(document["_id"]), **{field: document.get(field) for field in NEIGHBOR_FIELDS},
+            "score": round(score, 4)}
+
+async def update_related_articles(rebuild: bool = False) -> int:
+    """
+    Store the related articles of the recent articles that have none yet, and merge
+    them into the lists of the recent articles they are related to.
+
+    Scores computed in earlier runs are kept as they are, a rebuild recomputes every list
+    with the document frequencies of the current window.
+
+    Args:
+    - rebuild (bool): Recompute the lists of all the recent articles.
+
+    Returns:
+    - int: The number of documents whose related articles changed.
+    """
+    since = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(days=IngestConfig.RELATED_WINDOW_DAYS))
+    documents = await AsyncMongoClient.search_collection(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        {"_id": {"$gte": since}, RELATED_TERMS_FIELD: {"$exists": True}},
+        projection={RELATED_TERMS_FIELD: 1, RELATED_FIELD: 1, DUPLICATE_OF_FIELD: 1,
+                    **{field: 1 for field in NEIGHBOR_FIELDS}},
+        sort=[("_id", -1)],
+        limit=IngestConfig.RELATED_MAX_ARTICLES
+    )
+    targets = [i for i, document in enumerate(documents) if rebuild or RELATED_FIELD not in document]
+    if not targets:
+        return 0
+
+    positions = {document["_id"]: i for i, document in enumerate(documents)}
+    # Near-duplicates belong to the story of their canonical article and are never listed themselves
+    stories = [positions.get(document.get(DUPLICATE_OF_FIELD), i) for i, document in enumerate(documents)]
+    candidates = [i for i, document in enumerate(documents) if DUPLICATE_OF_FIELD not in document]
+    vectors = [document[RELATED_TERMS_FIELD] for document in documents]
+
+    target_set = set(targets)
+    existing = [i for i in range(len(documents)) if i not in target_set]
+    new_candidates = [i for i in targets if DUPLICATE_OF_FIELD not in documents[i]]
+
+    def compute_neighbors():
+        matrix = tfidf_matrix(vectors)
+        return (top_neighbors(matrix, targets, candidates, stories),
+                top_neighbors(matrix, existing, new_candidates, stories))
+
+    # The matrix products run off the event loop
+    target_neighbors, existing_neighbors = await asyncio.to_thread(compute_neighbors)
+
+    updates: Dict[int, List[Dict[str, Any]]] = {}
+    for i, neighbors in zip(targets, target_neighbors):
+        updates[i] = [_neighbor(documents[j], score) for j, score in neighbors]
+    for i, neighbors in zip(existing, existing_neighbors):
+        if not neighbors:
+            continue
+        current = documents[i].get(RELATED_FIELD) or []
+        merged = sorted(current + [_neighbor(documents[j], score) for j, score in neighbors],
+                        key=lambda neighbor: neighbor["score"], reverse=True)[:IngestConfig.RELATED_TOP_K]
+        if merged != current:
+            updates[i] = merged
+
+    operations = [UpdateOne({"_id": documents[i]["_id"]}, {"$set": {RELATED_FIELD: related}})
+                  for i, related in updates.items()]
+    document_ids = [documents[i]["_id"] for i in updates]
+    summary = await AsyncMongoClient.bulk_write(
+        MongoConfig.NEWS_DATABASE,
+        MongoConfig.NEWS_COLLECTION,
+        operations,
+        ordered=False
+    )
+    for error in summary["errors"]:
+        print(f"Error storing the related articles of {document_ids[error['index']]}: {error['message']}")
+    print(f"Related articles: {len(targets)} articles scored against {len(candidates)}, "
+          f"{summary['modified_count']} documents updated")
+    return summary["modified_count"]
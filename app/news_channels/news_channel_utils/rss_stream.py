@@ -0,0 +1,106 @@
+"""
+Streaming RSS parser.
+
+The parser is fed raw bytes as they arrive from the network and returns each <item>
+as soon as its closing tag has been read, so a feed never has to be held in memory
+as a whole. Finished items are cleared from the tree as the parser goes.
+"""
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Size of the chunks read from the response body
+RSS_CHUNK_SIZE = 16 * 1024
+
+# <item> children read as plain text, mapped to their RssItem attribute
+ITEM_TEXT_FIELDS = {
+    "title": "title",
+    "link": "link",
+    "description": "description",
+    "pubDate": "pub_date",
+}
+
+@dataclass(slots=True)
+class RssItem:
+    title: Optional[str] = None
+    link: Optional[str] = None
+    description: Optional[str] = None
+    guid: Optional[str] = None
+    guid_is_permalink: Optional[str] = None
+    pub_date: Optional[str] = None
+    source: Optional[str] = None
+    source_url: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the item to the dictionary shape stored in the news collection."""
+        return {
+            "title": self.title,
+            "link": self.link,
+            "description": self.description,
+            "guid": self.guid,
+            "guid_is_permalink": self.guid_is_permalink,
+            "pubDate": self.pub_date,
+            "source": self.source,
+            "source_url": self.source_url
+        }
+
+class RssStreamParser:
+    """
+    Incremental RSS parser.
+
+    Call feed() with each chunk of the body and close() once the body is complete;
+    both return the items completed by that chunk. Channel-level lastBuildDate and
+    pubDate are available as attributes as soon as they have been read.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._channel: Optional[ET.Element] = None
+        self._item: Optional[Dict[str, Optional[str]]] = None
+        self.last_build_date: Optional[str] = None
+        self.pub_date: Optional[str] = None
+
+    def feed(self, data: bytes) -> List[RssItem]:
+        """Parse the next chunk of the body and return the items it completed."""
+        self._parser.feed(data)
+        return self._read_events()
+
+    def close(self) -> List[RssItem]:
+        """Finish parsing and return the remaining items."""
+        self._parser.close()
+        return self._read_events()
+
+    def _read_events(self) -> List[RssItem]:
+        items = []
+        for event, elem in self._parser.read_events():
+            tag = elem.tag
+            if event == "start":
+                if tag == "item":
+                    self._item = {}
+                elif tag == "channel":
+                    self._channel = elem
+                continue
+
+            if self._item is None:
+                # Channel-level metadata, the first occurrence wins
+                if tag == "lastBuildDate" and self.last_build_date is None:
+                    self.last_build_date = elem.text
+                elif tag == "pubDate" and self.pub_date is None:
+                    self.pub_date = elem.text
+                continue
+
+            if tag == "item":
+                items.append(RssItem(**self._item))
+                self._item = None
+                # Drop the finished item (and anything before it) from the tree
+                if self._channel is not None:
+                    self._channel.clear()
+            elif tag in ITEM_TEXT_FIELDS:
+                self._item.setdefault(ITEM_TEXT_FIELDS[tag], elem.text)
+            elif tag == "guid" and "guid" not in self._item:
+                self._item["guid"] = elem.text
+                self._item["guid_is_permalink"] = elem.get("isPermaLink")
+            elif tag == "source" and "source" not in self._item:
+                self._item["source"] = elem.text
+                self._item["source_url"] = elem.get("url")
+        return items
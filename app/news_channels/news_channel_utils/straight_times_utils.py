@@ -2,211 +2,471 @@
 Utility functions for Straight Times news channel.
 """
 import os
-import aiohttp
 import xml.etree.ElementTree as ET
-from typing import List, Dict, Any
+import hashlib
+from typing import List, Dict, Any, Optional, AsyncIterator
+from urllib.parse import urlparse
 from ..news_config import NEWS_CHANNELS
+from ...config import FeedFetchConfig, IngestConfig
+from ...http_client import HttpClient
+from ...indexes import reconcile_indexes
+from ...category_stats import ensure_category_stats
+from ...normalization import normalize_news_item
+from ...jobs import get_job_queue, run_worker, default_worker_id
 import json
 import asyncio
-from .mongo_news_utils import MongoClient, MongoConfig
-from ...crawler.crawler_utils import smart_news_crawler
+from .feed_state import FeedStateStore
+from .dedup import filter_unseen_items, ensure_dedup_keys, DEDUP_KEY_FIELD
+from .near_duplicates import mark_near_duplicates, link_near_duplicate, NEAR_DUPLICATE_KEY
+from .related_articles import related_term_fields, update_related_articles
+from .news_writer import NewsWriteBuffer
+from .rss_stream import RssItem, RssStreamParser, RSS_CHUNK_SIZE
 from asyncio import Semaphore
 import re
 
 # Get channel specific configuration
 CHANNEL_CONFIG = NEWS_CHANNELS["straight_times"] if "straight_times" in NEWS_CHANNELS else None
 
+# Kind of the queued jobs that crawl, enrich and store one news item
+ENRICH_JOB = "straight_times.enrich"
 
-async def parse_straight_times_opml_async(url):
+
+async def parse_straight_times_opml_async(url, feed_state: Optional[Dict[str, Any]] = None):
     """
     Asynchronously fetches and parses an OPML file from the given URL,
     extracting specific fields into a dictionary.
     
     Args:
     - url (str): The URL of the OPML file.
+    - feed_state (dict): The stored state of the OPML file, used for a conditional GET.
     
     Returns:
-    - dict: A dictionary with 'AllFeedDateModified' and a list of feeds with categories and rss links.
+    - dict: A dictionary with 'AllFeedDateModified', a list of feeds with categories and rss links,
+      'not_modified' and the new 'feed_state'. The stored feed list is reused when unchanged.
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            if response.status != 200:
-                raise Exception(f"Failed to fetch data. HTTP Status Code: {response.status}")
-            
-            # Read and parse the XML content
-            content = await response.text()
-            root = ET.fromstring(content)
-            
-            # Extract the `dateModified` field
-            date_modified = root.find("./head/dateModified").text
-            
-            # Extract category (text) and RSS link (xmlUrl) from the <outline> tags
-            feeds = []
-            for outline in root.findall("./body/outline"):
-                category = outline.get("text")
-                rss_link = outline.get("xmlUrl")
-                feeds.append({"category": category, "rss_link": rss_link})
-            
-            # Construct the result dictionary
-            result = {
-                "AllFeedDateModified": date_modified,
-                "feeds": feeds
+    session = HttpClient.get_session()
+    headers = FeedStateStore.conditional_headers(feed_state)
+    async with session.get(url, headers=headers) as response:
+        if response.status == 304 and feed_state:
+            return {
+                "AllFeedDateModified": feed_state.get("last_build_date"),
+                "feeds": feed_state.get("feeds", []),
+                "not_modified": True,
+                "feed_state": FeedStateStore.from_response(url, response, previous=feed_state)
+            }
+        if response.status != 200:
+            raise Exception(f"Failed to fetch data. HTTP Status Code: {response.status}")
+        
+        # Read and parse the XML content
+        content = await response.read()
+        state = FeedStateStore.from_response(url, response, content, previous=feed_state)
+        if FeedStateStore.is_unchanged(feed_state, state, "content_hash") and feed_state.get("feeds"):
+            return {
+                "AllFeedDateModified": feed_state.get("last_build_date"),
+                "feeds": feed_state["feeds"],
+                "not_modified": True,
+                "feed_state": state
             }
-            return result
+        root = ET.fromstring(content)
+        
+        # Extract the `dateModified` field
+        date_modified = root.find("./head/dateModified").text
+        
+        # Extract category (text) and RSS link (xmlUrl) from the <outline> tags
+        feeds = []
+        for outline in root.findall("./body/outline"):
+            category = outline.get("text")
+            rss_link = outline.get("xmlUrl")
+            feeds.append({"category": category, "rss_link": rss_link})
+
+        state["last_build_date"] = date_modified
+        state["feeds"] = feeds
+        not_modified = FeedStateStore.is_unchanged(feed_state, state, "last_build_date")
+        if not not_modified:
+            FeedStateStore.mark_changed(state)
+        
+        # Construct the result dictionary
+        result = {
+            "AllFeedDateModified": date_modified,
+            "feeds": feeds,
+            "not_modified": not_modified,
+            "feed_state": state
+        }
+        return result
+
+def _unchanged_rss_feed(feed_state: Dict[str, Any]) -> Dict[str, Any]:
+    """Result of parse_rss_feed for a feed that has not changed since the last run."""
+    return {
+        "lastBuildDate": feed_state.get("last_build_date"),
+        "pubDate": None,
+        "items": [],
+        "not_modified": True,
+        "feed_state": feed_state
+    }
+
+async def iter_rss_feed(
+    rss_link: str,
+    feed_state: Optional[Dict[str, Any]] = None,
+    feed_info: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[RssItem]:
+    """
+    Asynchronously streams the items of an RSS feed as they are downloaded.
+
+    The body is read in chunks and parsed incrementally, so each item is yielded as
+    soon as it is complete. When a stored feed state is given, the request is made
+    conditional on its ETag and Last-Modified, and nothing is yielded if the server
+    answers 304 or the lastBuildDate is unchanged (the download stops as soon as the
+    lastBuildDate has been read).
+
+    Args:
+    - rss_link (str): The URL of the RSS feed.
+    - feed_state (dict): The stored state of the feed from FeedStateStore.
+    - feed_info (dict): Filled once the feed is exhausted with lastBuildDate, pubDate,
+      'not_modified' and the new 'feed_state' to save once the items have been processed.
+      'not_modified' is also set if the body hash turns out to be unchanged, in which case
+      the yielded items were already seen.
+
+    Yields:
+    - RssItem: The items of the feed, in document order.
+    """
+    feed_info = {} if feed_info is None else feed_info
+    session = HttpClient.get_session()
+    headers = FeedStateStore.conditional_headers(feed_state)
+    async with session.get(rss_link, headers=headers) as response:
+        if response.status == 304 and feed_state:
+            feed_info.update(_unchanged_rss_feed(FeedStateStore.from_response(rss_link, response, previous=feed_state)))
+            return
+        if response.status != 200:
+            raise Exception(f"Failed to fetch RSS feed. HTTP Status Code: {response.status}")
+
+        state = FeedStateStore.from_response(rss_link, response, previous=feed_state)
+        parser = RssStreamParser()
+        content_hash = hashlib.sha256()
+        build_date_checked = False
+        async for chunk in response.content.iter_chunked(RSS_CHUNK_SIZE):
+            content_hash.update(chunk)
+            items = parser.feed(chunk)
+
+            # Stop downloading if the feed has not been rebuilt since the last run
+            if not build_date_checked and parser.last_build_date is not None:
+                build_date_checked = True
+                state["last_build_date"] = parser.last_build_date
+                if FeedStateStore.is_unchanged(feed_state, state, "last_build_date"):
+                    feed_info.update(_unchanged_rss_feed(state))
+                    return
+
+            for item in items:
+                yield item
+
+        for item in parser.close():
+            yield item
+
+        state["last_build_date"] = parser.last_build_date
+        state["content_hash"] = content_hash.hexdigest()
+        not_modified = FeedStateStore.is_unchanged(feed_state, state, "content_hash")
+        if not not_modified:
+            FeedStateStore.mark_changed(state)
 
-async def parse_rss_feed(rss_link):
+        feed_info.update({
+            "lastBuildDate": parser.last_build_date,
+            "pubDate": parser.pub_date,
+            "not_modified": not_modified,
+            "feed_state": state
+        })
+
+async def parse_rss_feed(rss_link, feed_state: Optional[Dict[str, Any]] = None):
     print(f" Parsing RSS Feed: {rss_link}")
     """
     Asynchronously fetches and parses an RSS feed, extracting lastBuildDate, pubDate,
-    and details for each item.
+    and details for each item. See iter_rss_feed for how unchanged feeds are skipped.
     
     Args:
     - rss_link (str): The URL of the RSS feed.
+    - feed_state (dict): The stored state of the feed from FeedStateStore.
     
     Returns:
-    - dict: A dictionary containing lastBuildDate, pubDate, and a list of items with their details.
+    - dict: A dictionary containing lastBuildDate, pubDate, a list of items with their details,
+      'not_modified' and the new 'feed_state' to save once the items have been processed.
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(rss_link) as response:
-            if response.status != 200:
-                raise Exception(f"Failed to fetch RSS feed. HTTP Status Code: {response.status}")
-            
-            # Parse the RSS content
-            content = await response.text()
-            root = ET.fromstring(content)
-            
-            # Extract channel-level metadata
-            channel = root.find("channel")
-            last_build_date = channel.find("lastBuildDate").text if channel.find("lastBuildDate") is not None else None
-            pub_date = channel.find("pubDate").text if channel.find("pubDate") is not None else None
-            
-            # Extract all items
-            items = []
-            for item in channel.findall("item"):
-                title = item.find("title").text if item.find("title") is not None else None
-                link = item.find("link").text if item.find("link") is not None else None
-                description = item.find("description").text if item.find("description") is not None else None
-                guid = item.find("guid").text if item.find("guid") is not None else None
-                guid_is_permalink = item.find("guid").get("isPermaLink") if item.find("guid") is not None else None
-                item_pub_date = item.find("pubDate").text if item.find("pubDate") is not None else None
-                source = item.find("source").text if item.find("source") is not None else None
-                source_url = item.find("source").get("url") if item.find("source") is not None else None
-                
-                items.append({
-                    "title": title,
-                    "link": link,
-                    "description": description,
-                    "guid": guid,
-                    "guid_is_permalink": guid_is_permalink,
-                    "pubDate": item_pub_date,
-                    "source": source,
-                    "source_url": source_url
-                })
-            
-            # Construct the result
-            result = {
-                "lastBuildDate": last_build_date,
-                "pubDate": pub_date,
-                "items": items
-            }
-            return result
+    feed_info = {}
+    items = [item.to_dict() async for item in iter_rss_feed(rss_link, feed_state, feed_info)]
+    if feed_info.get("not_modified"):
+        items = []
+
+    # Construct the result
+    result = {**feed_info, "items": items}
+    return result
+
+async def fetch_rss_feeds_concurrently(
+    feeds: List[Dict[str, str]],
+    max_concurrency: int = FeedFetchConfig.MAX_CONCURRENCY,
+    max_per_host: int = FeedFetchConfig.MAX_PER_HOST,
+    feed_timeout: float = FeedFetchConfig.FEED_TIMEOUT,
+    feed_states: Optional[Dict[str, Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fetches and parses several RSS feeds concurrently.
+
+    Args:
+    - feeds (list): Feeds from the OPML file, each with 'category' and 'rss_link'.
+    - max_concurrency (int): Maximum number of feeds fetched at the same time.
+    - max_per_host (int): Maximum number of feeds fetched at the same time from one host.
+    - feed_timeout (float): Seconds allowed for a single feed before it is skipped.
+    - feed_states (dict): Stored feed states keyed by RSS link, used for conditional GETs.
+
+    Returns:
+    - list: The parsed feeds (with 'category' added), in the same order as `feeds`.
+      Feeds that failed or timed out are left out.
+    """
+    feed_states = feed_states or {}
+    global_semaphore = Semaphore(max_concurrency)
+    host_semaphores: Dict[str, Semaphore] = {}
+
+    async def fetch_feed(feed: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        category = feed.get("category")
+        rss_link = feed.get("rss_link")
+        host = urlparse(rss_link).netloc
+        host_semaphore = host_semaphores.setdefault(host, Semaphore(max_per_host))
+
+        # Take the per-host slot first so a busy host does not hold global slots
+        async with host_semaphore:
+            async with global_semaphore:
+                try:
+                    rss_feed = await asyncio.wait_for(
+                        parse_rss_feed(rss_link, feed_states.get(rss_link)),
+                        timeout=feed_timeout
+                    )
+                except asyncio.TimeoutError:
+                    print(f" Timed out after {feed_timeout}s fetching RSS feed: {rss_link}")
+                    return None
+                except Exception as e:
+                    print(f" Error fetching RSS feed {rss_link}: {str(e)}")
+                    return None
+
+        # Add the category to the feed
+        rss_feed["category"] = category
+        return rss_feed
+
+    tasks = [fetch_feed(feed) for feed in feeds if feed.get("rss_link")]
+    rss_feeds = await asyncio.gather(*tasks)
+    return [rss_feed for rss_feed in rss_feeds if rss_feed is not None]
 
-async def fetch_rss_all_feeds() -> List[Dict[str, str]]:
+async def fetch_rss_all_feeds(
+    pending_feed_states: Optional[List[Dict[str, Any]]] = None,
+    feed_items: Optional[Dict[str, List[Dict[str, Any]]]] = None
+) -> List[Dict[str, str]]:
+    """
+    Fetches the items of every Straits Times RSS feed that is due and changed since the last run.
+
+    Each feed is polled on its own adaptive interval (see FeedStateStore.schedule_next),
+    feeds that are not due yet are skipped.
+
+    Args:
+    - pending_feed_states (list): When given, the new feed states are appended to it so the
+      caller can schedule and save them once the items are stored. Otherwise they are
+      scheduled on whether their content changed and saved right away.
+    - feed_items (dict): When given, filled with the items of each fetched feed keyed by RSS link.
+
+    Returns:
+    - list: The news items of the changed feeds, each with its 'category'.
+    """
     print(f" All Feeds URL: {CHANNEL_CONFIG['all_feeds_url']}")
     all_feeds_url = CHANNEL_CONFIG['all_feeds_url']
-    result = await parse_straight_times_opml_async(all_feeds_url)
+    # load the stored state of the OPML file and all the feeds in one query
+    feed_states = await FeedStateStore.load_all()
+    result = await parse_straight_times_opml_async(all_feeds_url, feed_states.get(all_feeds_url))
     # save the all feeds to a json
     # with open("all_feeds.json", "w") as f:
     #     json.dump(result, f, indent=4)
     # extract the list of feeds
     feeds = result.get("feeds", [])
-    # for each feed, get the rss link, and parse the rss feed
+    due_feeds = [feed for feed in feeds if FeedStateStore.is_due(feed_states.get(feed.get("rss_link")))]
+    print(f" {len(due_feeds)} of {len(feeds)} RSS feeds are due")
+    # fetch and parse all the rss feeds concurrently
+    rss_feeds = await fetch_rss_feeds_concurrently(due_feeds, feed_states=feed_states)
+
+    new_feed_states = [rss_feed["feed_state"] for rss_feed in rss_feeds]
+    skipped = sum(1 for rss_feed in rss_feeds if rss_feed.get("not_modified"))
+    print(f" {skipped} of {len(rss_feeds)} RSS feeds unchanged since the last run")
+
+    # Gather all the news items from the feeds
     news_items = []
-    rss_feeds = []
-    for feed in feeds:
-        category = feed.get("category")
-        rss_link = feed.get("rss_link")
-        # print(f"Category: {category}")
-        # print(f"RSS Link: {rss_link}")
-        if rss_link:
-            rss_feed = await parse_rss_feed(rss_link)
-            # Add the category to the feed
-            rss_feed["category"] = category
-            rss_feeds.append(rss_feed)
-
-            # Gather all the news items from the feeds
-            items = rss_feed.get("items", [])
-            # Add the category to the items
-            for item in items:
-                item["category"] = category
-                news_items.append(item)
+    for rss_feed in rss_feeds:
+        category = rss_feed.get("category")
+        items = rss_feed.get("items", [])
+        # Add the category to the items
+        for item in items:
+            item["category"] = category
+            news_items.append(item)
+        if feed_items is not None:
+            feed_items[rss_feed["feed_state"]["_id"]] = items
+
+    if pending_feed_states is None:
+        for state in new_feed_states:
+            FeedStateStore.schedule_next(state)
+        await FeedStateStore.save_many([result["feed_state"]] + new_feed_states)
+    else:
+        pending_feed_states.append(result["feed_state"])
+        pending_feed_states.extend(new_feed_states)
     return news_items
     
-async def update_news_to_db() -> None:
-    all_news_items = await fetch_rss_all_feeds()
-    semaphore = Semaphore(3)  # Limit concurrency to 3 parallel tasks
-    new_item_count = 0
-
-    async def process_news_item(news_item):
-        nonlocal new_item_count
-        title = news_item.get("title")
-
-
-
-        # sanitized_title = re.sub(r'[<>:"/\\|?*]', '_', title)
-        # trim_title = sanitized_title[:20] if len(sanitized_title) > 20 else sanitized_title
-        # # save the news item to a json
-        # folder_path = "news items"
-        # if not os.path.exists(folder_path):
-        #     os.makedirs(folder_path)
-        # file_name = f"{trim_title}.json"
-        # file_path = os.path.join(folder_path, file_name)
-        # with open(file_path, "w") as f:
-        #     json.dump(news_item, f, indent=4)
-
-        if title:
-            async with semaphore:  # Ensure only 3 tasks run concurrently
-                existing_news_item = MongoClient.search_collection(
-                    MongoConfig.NEWS_DATABASE,
-                    MongoConfig.NEWS_COLLECTION,
-                    {"title": title}
-                )
-                if not existing_news_item:
-                    link = news_item.get("link")
-                    news_item_generated = await smart_news_crawler(link)
-                    # print(f"Generated news item: {news_item_generated}")
-                    # save the generated news item to a json, with file name as title
-
-                    # sanitized_title = re.sub(r'[<>:"/\\|?*]', '_', title)
-                    # trim_title = sanitized_title[:20] if len(sanitized_title) > 20 else sanitized_title
-                    # gen_file_name = f"{trim_title}_generated.json"
-                    # folder_path = "news items"
-                    # if not os.path.exists(folder_path):
-                    #     os.makedirs(folder_path)
-                    # gen_file_path = os.path.join(folder_path, gen_file_name)
-                    # with open(gen_file_path, "w") as f:
-                    #     json.dump(news_item_generated, f, indent=4)
-
-                    # Safely remove the 'title' key if it exists
-                    news_item_generated.pop("title", None) 
-                    news_item = {**news_item, **news_item_generated}
-
-                    MongoClient.insert_document(
-                        MongoConfig.NEWS_DATABASE,
-                        MongoConfig.NEWS_COLLECTION,
-                        news_item
-                    )
-                    print(f"Inserted news item: {title}")
-                    new_item_count += 1
-                else:
-                    print(f"News item already exists: {title}")
+async def process_enrich_jobs(queue=None, worker_id: Optional[str] = None) -> Dict[str, int]:
+    """
+    Crawls, enriches and stores the queued news items until none is available.
+
+    A job is completed once its item is stored. Jobs whose crawl or insert fails are
+    retried with backoff by a later run, and dead-lettered after too many attempts.
+    Several processes can drain the queue at the same time. When the run is cancelled,
+    the buffered items are still written; jobs still being crawled are reclaimed by a
+    later run once their lease expires.
+
+    Args:
+    - queue: The job queue, get_job_queue() if None.
+    - worker_id (str): The lease owner of this process, default_worker_id() if None.
+
+    Returns:
+    - dict: 'enriched', the number of news items crawled and stored, 'linked', the number
+      of near-duplicates stored with the enrichment of their canonical article, 'failed',
+      the number of crawls and inserts that failed, and 'related', the number of documents
+      whose related articles changed.
+    """
+    # The crawler is only loaded once there is something to crawl
+    from ...crawler.crawler_utils import smart_news_crawler
+    from ...crawler.crawl_executor import crawl_executor
+    from ...crawler.crawler_config import graph_config
+    from ...crawler.batch_enrichment import BatchEnricher
+
+    queue = queue or await get_job_queue()
+    worker_id = worker_id or default_worker_id()
+    # Claimed jobs by dedup key, until their item is written
+    leased = {}
+    crawl_failures = 0
+    linked = 0
+
+    async def on_flushed(stored_items, failed):
+        await queue.complete_many([news_item[DEDUP_KEY_FIELD] for news_item in stored_items], worker_id)
+        for news_item in stored_items:
+            leased.pop(news_item[DEDUP_KEY_FIELD], None)
+        for failure in failed:
+            job = leased.pop(failure["document"][DEDUP_KEY_FIELD], None)
+            if job is not None:
+                await queue.fail(job, worker_id, failure["error"]["message"] or "insert failed")
+
+    write_buffer = NewsWriteBuffer(on_flushed=on_flushed)
+    batcher = BatchEnricher(graph_config)
+
+    async def process_news_item(job):
+        nonlocal crawl_failures, linked
+        news_item = job["payload"]
+        canonical_key = news_item.pop(NEAR_DUPLICATE_KEY, None)
+        if canonical_key:
+            # Near-duplicates reuse the enrichment of their canonical article instead of a crawl
+            linked_item = await link_near_duplicate(news_item, canonical_key)
+            if linked_item is not None:
+                linked += 1
+                leased[job["_id"]] = job
+                await write_buffer.add({**linked_item, **related_term_fields(linked_item)})
+                return
+            # The canonical article may still be in the queue, wait for it unless this is the last attempt
+            if job["attempts"] < queue.max_attempts:
+                raise Exception(f"Canonical article {canonical_key} is not stored yet")
+        try:
+            news_item_generated = await smart_news_crawler(news_item.get("link"), news_item=news_item, batcher=batcher)
+        except Exception:
+            crawl_failures += 1
+            raise
+        # print(f"Generated news item: {news_item_generated}")
+
+        # Safely remove the 'title' key if it exists
+        news_item_generated.pop("title", None)
+        news_item = {**news_item, **news_item_generated}
+        leased[job["_id"]] = job
+        await write_buffer.add({**news_item, **related_term_fields(news_item)})
+
+    # The crawl executor admits `capacity` crawls (running plus queued) and a batch takes
+    # a single crawl, so up to `capacity` full batches of items are kept in flight
+    try:
+        await run_worker(
+            queue,
+            ENRICH_JOB,
+            process_news_item,
+            worker_id=worker_id,
+            concurrency=crawl_executor.capacity * max(batcher.max_articles, 1),
+            complete_on_return=False
+        )
+    finally:
+        # Items already crawled are stored (and their jobs completed) even when the
+        # run is cancelled, e.g. by the channel's time budget
+        await asyncio.shield(write_buffer.flush())
+
+    print(f"Updated {write_buffer.inserted_count} news items to the database")
+    print(f"Crawl executor: {crawl_executor.stats()}, batch enrichment: {batcher.stats()}")
+    # Score the stored articles against the recent ones in one batch
+    related = 0
+    if IngestConfig.RELATED_ENABLED and write_buffer.inserted_count:
+        related = await update_related_articles()
+    return {
+        "enriched": write_buffer.inserted_count - linked,
+        "linked": linked,
+        "failed": crawl_failures + len(write_buffer.failed),
+        "related": related
+    }
+
+async def update_news_to_db() -> Dict[str, int]:
+    """
+    Fetches the due feeds, queues their new items and crawls, enriches and stores the queue.
+
+    Returns:
+    - dict: 'feeds' (number of feeds polled), 'fetched' (items read from them), 'new'
+      (items not stored yet), 'enriched' (items crawled and stored, including ones left
+      over by earlier runs), 'linked' (near-duplicates stored without a crawl),
+      'failed' (crawls and inserts that failed) and 'related' (documents whose related
+      articles changed).
+    """
+    await reconcile_indexes()
+    # Stored articles are counted once, new ones are then added as they are inserted
+    await ensure_category_stats()
+    # Documents stored before dedup keys existed would not be recognized otherwise
+    await ensure_dedup_keys()
+    # Feed states are only saved once the items are queued, so a failed run is retried
+    pending_feed_states = []
+    feed_items = {}
+    all_news_items = await fetch_rss_all_feeds(pending_feed_states, feed_items)
+
+    # Resolve every item of the cycle against the database in one query
+    new_news_items = await filter_unseen_items(all_news_items)
+    print(f"{len(new_news_items)} of {len(all_news_items)} news items are new")
+    # Clean the display fields once here instead of on every read
+    for news_item in new_news_items:
+        normalize_news_item(news_item)
+    if IngestConfig.NEAR_DUP_ENABLED:
+        near_duplicates = await mark_near_duplicates(new_news_items)
+        print(f"{near_duplicates} new news items are near-duplicates of other articles")
+
+    # Queue the items durably before crawling, a crash or restart resumes from the queue
+    queue = await get_job_queue()
+    queued = await queue.enqueue_many(
+        ENRICH_JOB,
+        [(news_item[DEDUP_KEY_FIELD], news_item) for news_item in new_news_items]
+    )
+    print(f"Queued {queued} news items for enrichment")
 
-    # Create tasks for all news items
-    tasks = [process_news_item(news_item) for news_item in all_news_items]
-    # Run the tasks concurrently with the specified concurrency level
-    await asyncio.gather(*tasks)
+    # Busy feeds are polled sooner, feeds without new items back off
+    new_item_ids = {id(news_item) for news_item in new_news_items}
+    for state in pending_feed_states:
+        if state["_id"] in feed_items:
+            new_items = sum(1 for item in feed_items[state["_id"]] if id(item) in new_item_ids)
+            FeedStateStore.schedule_next(state, new_items)
+    await FeedStateStore.save_many(pending_feed_states)
 
-    print(f"Updated {new_item_count} news items to the database")
+    # Also picks up the jobs left over by earlier runs
+    enrich_stats = await process_enrich_jobs(queue)
+    return {
+        "feeds": len(feed_items),
+        "fetched": len(all_news_items),
+        "new": len(new_news_items),
+        **enrich_stats
+    }
     
 async def main():
     # rss_link = "https://www.straitstimes.com/news/world/rss.xml"
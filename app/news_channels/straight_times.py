@@ -4,17 +4,21 @@ Straight Times news channel implementation.
 from typing import List, Dict, Any
 from .news_config import NEWS_CHANNELS
 from .news_channel_utils import straight_times_utils
+from ..http_client import HttpClient
+from ..mongo import AsyncMongoClient
 
 # Get channel specific configuration
 CHANNEL_CONFIG = NEWS_CHANNELS["straight_times"] if "straight_times" in NEWS_CHANNELS else None
 
-async def update_news() -> None:
+async def update_news() -> Dict[str, int]:
     """
     Update news from Straight Times to the database.
+
+    Returns:
+        Counts of the update, see straight_times_utils.update_news_to_db
     """
     # Update the db with the latest news
-    await straight_times_utils.update_news_to_db()
-    pass
+    return await straight_times_utils.update_news_to_db()
 
 async def extract_news() -> List[Dict[str, Any]]:
     """
@@ -45,7 +49,11 @@ if __name__ == "__main__":
         # await update_news()
         
         print("\nTesting update_news()...")
-        await update_news()
+        try:
+            await update_news()
+        finally:
+            await HttpClient.close()
+            AsyncMongoClient.close_mongo_connection()
 
     # Run the async main function
     asyncio.run(main())
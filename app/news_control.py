@@ -1,46 +1,157 @@
 """
 Central control module for managing different news channels.
 """
-from typing import Optional, Dict, Any
+import sys
+import time
+import asyncio
+import importlib
+from typing import Optional, Dict, Any, List
 
-from .news_channels import (
-    straight_times,
-    new_york_times,
-    cna,
-)
 from .news_channels.news_config import NEWS_CHANNELS
+from .http_client import HttpClient
+from .mongo import AsyncMongoClient
+from .config import IngestConfig
 
 class NewsChannelNotFoundError(Exception):
     """Raised when specified news channel is not found."""
     pass
 
 class NewsController:
+    # Channel modules are imported on first use, so importing the controller stays cheap
     _channel_modules = {
-        "straight_times": straight_times,
-        "new_york_times": new_york_times,
-        "cna": cna,
+        "straight_times": ".news_channels.straight_times",
+        "new_york_times": ".news_channels.new_york_times",
+        "cna": ".news_channels.cna",
     }
+    _loaded_modules: Dict[str, Any] = {}
+
+    @classmethod
+    def register_channel(cls, channel_name: str, module_path: str) -> None:
+        """
+        Register a channel module by its import path, without importing it.
+
+        Args:
+            channel_name: Name of the news channel
+            module_path: Absolute module path, or relative to the app package
+        """
+        cls._channel_modules[channel_name] = module_path
+        cls._loaded_modules.pop(channel_name, None)
 
     @classmethod
     def _get_channel_module(cls, channel_name: str):
-        """Get the module for the specified channel name."""
+        """Get the module for the specified channel name, importing it on first use."""
         if channel_name not in cls._channel_modules:
             raise NewsChannelNotFoundError(f"News channel '{channel_name}' not found")
-        return cls._channel_modules[channel_name]
+        if channel_name not in cls._loaded_modules:
+            cls._loaded_modules[channel_name] = importlib.import_module(
+                cls._channel_modules[channel_name], __package__
+            )
+        return cls._loaded_modules[channel_name]
+
+    @classmethod
+    async def startup(cls) -> None:
+        """Create the shared resources used by the channel modules."""
+        await HttpClient.start()
+        AsyncMongoClient.connect_to_mongo()
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """Release the shared resources used by the channel modules."""
+        await HttpClient.close()
+        AsyncMongoClient.close_mongo_connection()
+        # Only shut the crawl executor down if a crawl loaded it
+        crawl_executor_module = sys.modules.get(f"{__package__}.crawler.crawl_executor")
+        if crawl_executor_module is not None:
+            crawl_executor_module.crawl_executor.shutdown(wait=False)
 
     @classmethod
-    async def update_news(cls, channel_name: str) -> None:
+    async def update_news(cls, channel_name: str) -> Optional[Dict[str, int]]:
         """
         Update news for the specified channel.
         
         Args:
             channel_name: Name of the news channel to update
+
+        Returns:
+            Counts reported by the channel ('fetched', 'new', 'enriched', 'failed', ...),
+            None if the channel does not report any
             
         Raises:
             NewsChannelNotFoundError: If the specified channel is not found
         """
         channel_module = cls._get_channel_module(channel_name)
-        await channel_module.update_news()
+        return await channel_module.update_news()
+
+    @classmethod
+    async def _update_channel(cls, channel_name: str, timeout: float) -> Dict[str, Any]:
+        """Update one channel within its time budget, turning any failure into its result."""
+        result = {
+            "status": "ok",
+            "fetched": 0,
+            "new": 0,
+            "enriched": 0,
+            "failed": 0,
+            "duration": 0.0,
+            "error": None,
+        }
+        started = time.monotonic()
+        try:
+            stats = await asyncio.wait_for(cls.update_news(channel_name), timeout=timeout)
+            result.update(stats or {})
+        except asyncio.TimeoutError:
+            result["status"] = "timeout"
+            result["error"] = f"Update did not finish within {timeout:.0f}s"
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+        result["duration"] = round(time.monotonic() - started, 3)
+        return result
+
+    @classmethod
+    async def update_all(
+        cls,
+        channel_names: Optional[List[str]] = None,
+        deadline: float = IngestConfig.UPDATE_DEADLINE,
+        channel_budget: float = IngestConfig.CHANNEL_BUDGET
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Update several channels concurrently.
+
+        Every channel runs under its own time budget and is stopped when the budget or
+        the global deadline runs out. A failing or slow channel does not affect the others.
+        A stopped channel still writes the items it had already crawled; the items it
+        had queued but not crawled yet are picked up by a later update.
+
+        Args:
+            channel_names: Channels to update, every configured channel if None
+            deadline: Seconds allowed for the whole update
+            channel_budget: Seconds allowed per channel, unless the channel
+                configuration sets 'update_budget'
+
+        Returns:
+            Dict mapping each channel to its result: 'status' ('ok', 'failed' or
+            'timeout'), 'fetched', 'new', 'enriched', 'failed', 'duration' in seconds
+            and 'error'
+
+        Raises:
+            NewsChannelNotFoundError: If one of the channels is not found
+        """
+        channel_names = channel_names or list(NEWS_CHANNELS)
+        for channel_name in channel_names:
+            cls._get_channel_module(channel_name)
+
+        budgets = [
+            min(deadline, NEWS_CHANNELS.get(channel_name, {}).get("update_budget", channel_budget))
+            for channel_name in channel_names
+        ]
+        results = await asyncio.gather(*(
+            cls._update_channel(channel_name, budget)
+            for channel_name, budget in zip(channel_names, budgets)
+        ))
+        for channel_name, result in zip(channel_names, results):
+            print(f"Channel {channel_name}: {result['status']} in {result['duration']}s, "
+                  f"{result['new']} new, {result['enriched']} enriched, {result['failed']} failed")
+        return dict(zip(channel_names, results))
 
     @classmethod
     async def get_news(cls, channel_name: str) -> Dict[str, Any]:
@@ -97,6 +208,8 @@ if __name__ == "__main__":
             print(f"Error caught successfully: {e}")
         except Exception as e:
             print(f"Unexpected error: {e}")
+        finally:
+            await NewsController.shutdown()
 
     # Run the async main function
     asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Normalization of news items, done once at ingest time so the read path serves
+stored fields as they are.
+"""
+import re
+import html
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Bump when normalize_news_item changes, so the backfill migration re-runs on stored items
+NORMALIZATION_VERSION = 1
+
+# Lower-cased category aliases mapped to the stored category name
+CATEGORY_ALIASES = {
+    "sport": "Sport",
+    "sports": "Sport",
+    "world": "World",
+    "global": "World",
+}
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Query parameters that track the visit rather than identify the article
+TRACKING_PARAMETERS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga",
+})
+TRACKING_PARAMETER_PREFIXES = ("utm_",)
+
+def canonical_category(category: Optional[str]) -> Optional[str]:
+    """Map a category or one of its aliases to the stored category name."""
+    if not category:
+        return category
+    category = category.strip()
+    return CATEGORY_ALIASES.get(category.lower(), category)
+
+def canonical_link(link: Optional[str]) -> Optional[str]:
+    """
+    Normalize an article link so that the same article always gets the same key:
+    lower-cased scheme and host, no fragment or trailing slash, and the query
+    parameters without the tracking ones (see TRACKING_PARAMETERS), sorted. The other
+    parameters are kept, some sites identify their articles by them (?id=123).
+    """
+    if not link:
+        return None
+    parts = urlsplit(link.strip())
+    path = parts.path.rstrip("/") or "/"
+    parameters = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMETERS and not name.lower().startswith(TRACKING_PARAMETER_PREFIXES)
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(parameters), ""))
+
+def clean_html(text: Optional[str]) -> str:
+    """Strip HTML tags and entities from a feed field and collapse whitespace."""
+    if not text:
+        return ""
+    text = html.unescape(TAG_PATTERN.sub(" ", text))
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+def parse_pub_date(pub_date: Optional[str]) -> Optional[datetime]:
+    """Parse an RSS (RFC 822) date into a UTC datetime, None if it is missing or invalid."""
+    if not pub_date:
+        return None
+    try:
+        parsed = parsedate_to_datetime(pub_date)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+def normalized_fields(news_item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute the normalized display fields of a news item.
+
+    Returns:
+    - dict: 'description' without HTML, canonical 'category', 'published_at' parsed
+      from pubDate and the 'normalized_version'.
+    """
+    return {
+        "description": clean_html(news_item.get("description")),
+        "category": canonical_category(news_item.get("category")),
+        "published_at": parse_pub_date(news_item.get("pubDate")),
+        "normalized_version": NORMALIZATION_VERSION,
+    }
+
+def normalize_news_item(news_item: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a news item in place and return it."""
+    news_item.update(normalized_fields(news_item))
+    return news_item
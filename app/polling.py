@@ -0,0 +1,42 @@
+"""
+Adaptive polling intervals, shared by the channel scheduler and the RSS feed fetcher.
+
+A source that had new items is polled sooner next time, one that had none backs off,
+within fixed bounds. Every interval gets some jitter so sources polled together drift
+apart instead of hitting the network (and the crawler) at the same moment.
+"""
+import random
+from typing import Optional
+
+from .config import SchedulerConfig
+
+def adapt_interval(
+    interval: Optional[float],
+    changed: Optional[bool],
+    min_interval: float,
+    max_interval: float,
+    default_interval: float
+) -> float:
+    """
+    Next polling interval of a source.
+
+    Args:
+        interval: The current interval in seconds, default_interval if None
+        changed: Whether the last poll found new items; None keeps the interval
+        min_interval: Shortest interval, for the busiest sources
+        max_interval: Longest interval, for dormant sources
+        default_interval: Interval of a source polled for the first time
+
+    Returns:
+        The next interval in seconds, without jitter
+    """
+    interval = interval or default_interval
+    if changed is True:
+        interval *= SchedulerConfig.SPEEDUP_FACTOR
+    elif changed is False:
+        interval *= SchedulerConfig.BACKOFF_FACTOR
+    return min(max_interval, max(min_interval, interval))
+
+def jittered(interval: float, jitter: float = SchedulerConfig.JITTER) -> float:
+    """Spread an interval randomly by up to +/- `jitter` of its length."""
+    return interval * random.uniform(1 - jitter, 1 + jitter)
@@ -1,14 +1,96 @@
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional, Literal
-from ..mongo import MongoClient
-from ..config import MongoConfig
+from typing import Any, Dict, List, Optional, Literal, Tuple
+from datetime import datetime, timezone
+from ..mongo import AsyncMongoClient
+from ..config import MongoConfig, Settings, IngestConfig
+from ..cache import ALL_CATEGORIES, news_cache, newest_edge_tag
+from ..category_stats import get_category_stats, get_category_boundaries
+from ..normalization import canonical_category
+from ..news_channels.news_channel_utils.near_duplicates import DUPLICATE_OF_FIELD
+from ..news_channels.news_channel_utils.related_articles import RELATED_FIELD, RELATED_TERMS_FIELD
 from bson import ObjectId
+import re
 
 router = APIRouter(
     prefix="/news",
     tags=["news"]
 )
 
+FIELD_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+# Internal fields never returned: left out of whole documents and rejected in fields
+INTERNAL_FIELDS = (RELATED_TERMS_FIELD,)
+FULL_DOCUMENT_PROJECTION = {field: 0 for field in INTERNAL_FIELDS}
+# Fields left out of cached responses: the related articles of stored documents are
+# rewritten by ingest without invalidating the cache, /news/{news_id}/related serves them
+CACHED_EXCLUDED_FIELDS = (RELATED_FIELD,)
+NAVIGATION_PROJECTION = {**FULL_DOCUMENT_PROJECTION, **{field: 0 for field in CACHED_EXCLUDED_FIELDS}}
+# Fields of the search results that get highlighted snippets
+SEARCH_HIGHLIGHT_FIELDS = ("title", "description", "summary")
+# Highlighted too when requested, it is the full body text so it is not fetched otherwise
+SEARCH_HIGHLIGHT_ARTICLE_FIELD = "article"
+
+def _parse_object_id(value: str, name: str) -> ObjectId:
+    """Parse an ObjectId query or path parameter, answering 400 if it is invalid."""
+    try:
+        return ObjectId(value)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid ObjectId format for {name}: {str(e)}")
+
+def _parse_fields(
+    fields: Optional[str],
+    default: Optional[List[str]],
+    excluded: Tuple[str, ...] = ()
+) -> Optional[Dict[str, int]]:
+    """
+    Build a projection from a comma-separated list of field names, answering 400 for
+    invalid names, internal fields (INTERNAL_FIELDS) and the `excluded` fields.
+    Returns None (all fields) when neither fields nor a default are given.
+    """
+    names = [name.strip() for name in fields.split(",") if name.strip()] if fields else default
+    if not names:
+        return None
+    invalid = [name for name in names
+               if not FIELD_NAME_PATTERN.match(name) or name in INTERNAL_FIELDS or name in excluded]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid field names: {', '.join(invalid)}")
+    return {name: 1 for name in names}
+
+def _serialize_ids(news_item: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert the ObjectIds of a news document to strings for JSON serialization."""
+    news_item["_id"] = str(news_item["_id"])
+    if news_item.get(DUPLICATE_OF_FIELD) is not None:
+        news_item[DUPLICATE_OF_FIELD] = str(news_item[DUPLICATE_OF_FIELD])
+    return news_item
+
+async def _has_neighbor(
+    news_id: ObjectId,
+    navigation: str,
+    category: Optional[str],
+    boundaries: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Whether there is an older ('next') or newer ('previous') item than news_id.
+    Answered from the category's newest and oldest IDs when its statistics are given.
+    """
+    if boundaries:
+        if navigation == "next":
+            return news_id > boundaries["oldest_id"]
+        if news_id < boundaries["newest_id"]:
+            return True
+        # Articles ingested after the statistics were cached are newer than the boundary, so query
+    query = {"_id": {"$lt": news_id} if navigation == "next" else {"$gt": news_id}}
+    if category:
+        query["category"] = category
+    items = await AsyncMongoClient.search_collection(
+        database=MongoConfig.NEWS_DATABASE,
+        collection=MongoConfig.NEWS_COLLECTION,
+        query=query,
+        projection={"_id": 1},
+        limit=1
+    )
+    return len(items) > 0
+
 @router.get("/get_news_simple")
 async def get_news_simple(
     last_retrieved_id: Optional[str] = Query(None, description="Last retrieved document ID"),
@@ -36,92 +118,392 @@ async def get_news_simple(
         sort_order = -1  # Default descending order for latest first
         
         # Add category filter if provided
+        category = canonical_category(category)
         if category:
-            if category.lower() in ["Sport","Sports","sport","sports"]:
-                category = "Sport"
-            if category.lower() in ["Global","global","GLOBAL","World","world","WORLD"]:
-                category = "World"
             query["category"] = category
+
+        # Repeated page views are answered from the cache
+        cache_key = ("get_news_simple", last_retrieved_id, navigation if last_retrieved_id else None, category)
+        cached_response = news_cache.get(cache_key)
+        if cached_response is not None:
+            return cached_response
         
+        last_id = None
         if last_retrieved_id:
-            try:
-                last_id = ObjectId(last_retrieved_id)
-                if navigation == "next":
-                    # Get older news (smaller ObjectId)
-                    query["_id"] = {"$lt": last_id}
-                    sort_order = -1
-                else:  # navigation == "previous"
-                    # Get newer news (larger ObjectId)
-                    query["_id"] = {"$gt": last_id}
-                    sort_order = 1
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Invalid ObjectId format: {str(e)}")
-
-        # Fetch current document
-        news_items = MongoClient.search_collection(
+            last_id = _parse_object_id(last_retrieved_id, "last_retrieved_id")
+            if navigation == "next":
+                # Get older news (smaller ObjectId), starting from the last retrieved one
+                query["_id"] = {"$lte": last_id}
+                sort_order = -1
+            else:  # navigation == "previous"
+                # Get newer news (larger ObjectId), starting from the last retrieved one
+                query["_id"] = {"$gte": last_id}
+                sort_order = 1
+
+        # The category's newest and oldest IDs answer the edge checks. Without
+        # statistics, a lookahead document tells if there are more in the same direction.
+        boundaries = await get_category_boundaries(category)
+        lookahead = 0 if boundaries else 1
+
+        # Fetch the last retrieved document (the boundary on the side we come from)
+        # and the current document in a single round-trip
+        news_items = await AsyncMongoClient.search_collection(
             database=MongoConfig.NEWS_DATABASE,
             collection=MongoConfig.NEWS_COLLECTION,
             query=query,
+            projection=NAVIGATION_PROJECTION,
             sort=[("_id", sort_order)],
-            limit=1
+            limit=(2 if last_id else 1) + lookahead
         )
+
+        came_from_item = bool(news_items) and last_id is not None and news_items[0]["_id"] == last_id
+        news_items = news_items[1:] if came_from_item else news_items[:1 + lookahead]
         
         if not news_items:
-            return {
+            response = {
                 "message": "No more news items available",
                 "id": None,
                 "data": None,
                 "has_next": False,
                 "has_previous": False
             }
+            # New articles can fill an empty page, so it sits at the newest edge
+            news_cache.set(cache_key, response, tags=[newest_edge_tag(category)])
+            return response
         
-        # Get the first (and only) item
+        # Get the current item and whether there are more in the same direction
         news_item = news_items[0]
+        current_id = news_item["_id"]
+        if boundaries:
+            has_more = await _has_neighbor(current_id, "next" if sort_order == -1 else "previous", category, boundaries)
+        else:
+            has_more = len(news_items) > 1
         
         # Convert ObjectId to string for JSON serialization
-        news_id = str(news_item["_id"])
-        news_item["_id"] = news_id
-        
-        # Check if there are more items in either direction
-        next_query = {"_id": {"$lt": ObjectId(news_id)}}
-        previous_query = {"_id": {"$gt": ObjectId(news_id)}}
+        news_id = _serialize_ids(news_item)["_id"]
+
+        if last_id is None:
+            # The latest item has nothing newer
+            has_next, has_previous = has_more, False
+        else:
+            # The last retrieved item is on the side we come from. If it is gone
+            # (deleted or not in this category), check that side explicitly.
+            has_back = came_from_item or await _has_neighbor(
+                current_id, "previous" if navigation == "next" else "next", category, boundaries
+            )
+            if navigation == "next":
+                has_next, has_previous = has_more, has_back
+            else:
+                has_next, has_previous = has_back, has_more
+
+        print("Current id: ", news_id)
+
+        response = {
+            "message": "Success",
+            "id": news_id,
+            "data": news_item,
+            "has_next": has_next,
+            "has_previous": has_previous
+        }
+        # Only the newest item of the category changes (has_previous) when articles are added
+        news_cache.set(cache_key, response, tags=[] if has_previous else [newest_edge_tag(category)])
+        return response
         
-        # Add category filter to next/previous queries if category is specified
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching news: {str(e)}")
+
+@router.get("/categories")
+async def get_categories():
+    """
+    Get the news categories with their number of articles, newest and oldest article
+    IDs and last ingest time, largest first.
+
+    Returns:
+        The categories, and the totals over all the news (articles without a category included)
+    """
+    stats = await get_category_stats()
+    categories = [
+        {
+            "category": category,
+            "count": category_stats["count"],
+            "newest_id": str(category_stats["newest_id"]),
+            "oldest_id": str(category_stats["oldest_id"]),
+            "last_ingest_at": category_stats.get("last_ingest_at"),
+        }
+        for category, category_stats in stats.items()
+    ]
+    totals = next((item for item in categories if item["category"] == ALL_CATEGORIES), None)
+    categories = sorted(
+        (item for item in categories if item is not totals),
+        key=lambda item: (-item["count"], item["category"])
+    )
+    if totals is not None:
+        del totals["category"]
+    return {
+        "message": "Success" if categories else "No news categories available",
+        "items": categories,
+        "totals": totals
+    }
+
+@router.get("/cache_stats")
+async def get_cache_stats():
+    """
+    Get the hit, miss, eviction and invalidation counters of this worker's news cache.
+    """
+    return news_cache.stats()
+
+@router.get("")
+async def get_news_page(
+    category: Optional[str] = Query(None, description="Category to filter news items"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page (next_cursor or previous_cursor)"),
+    direction: Literal["next", "previous"] = Query("next", description="'next' for older news, 'previous' for newer news"),
+    limit: int = Query(Settings.NEWS_PAGE_SIZE, ge=1, le=Settings.NEWS_PAGE_MAX_SIZE, description="Page size"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. 'title,category,pubDate,summary'")
+):
+    """
+    Get a page of news articles, newest first, with keyset pagination.
+    
+    Args:
+        category: Optional category to filter news items
+        cursor: next_cursor of a page to get the older page, previous_cursor to get the newer one
+        direction: 'next' with a next_cursor, 'previous' with a previous_cursor
+        limit: Number of items per page
+        fields: Fields to return for each item (always with '_id'), the list fields by default.
+            Fetch the full article with /news/{news_id}.
+    
+    Returns:
+        The items of the page and the cursors of the older (next_cursor) and
+        newer (previous_cursor) pages, None when there is no such page. An empty page
+        returns the given cursor to page back from.
+    """
+    category = canonical_category(category)
+    projection = _parse_fields(fields, Settings.NEWS_LIST_FIELDS, CACHED_EXCLUDED_FIELDS)
+    cursor_id = _parse_object_id(cursor, "cursor") if cursor else None
+
+    cache_key = ("news_page", category, cursor, direction, limit, tuple(projection or ()))
+    cached_response = news_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    try:
+        query = {}
         if category:
-            next_query["category"] = category
-            previous_query["category"] = category
-        
-        next_items = MongoClient.search_collection(
+            query["category"] = category
+        newer = cursor_id is not None and direction == "previous"
+        if cursor_id is not None:
+            query["_id"] = {"$gt": cursor_id} if newer else {"$lt": cursor_id}
+
+        # One extra item tells whether there is another page in the same direction
+        news_items = await AsyncMongoClient.search_collection(
             database=MongoConfig.NEWS_DATABASE,
             collection=MongoConfig.NEWS_COLLECTION,
-            query=next_query,
-            sort=[("_id", -1)],
-            limit=1
+            query=query,
+            projection=projection,
+            sort=[("_id", 1 if newer else -1)],
+            limit=limit + 1
         )
-        
-        previous_items = MongoClient.search_collection(
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching news: {str(e)}")
+
+    has_more = len(news_items) > limit
+    news_items = news_items[:limit]
+    if newer:
+        news_items.reverse()
+    for news_item in news_items:
+        _serialize_ids(news_item)
+
+    # An empty page (paged past the end) hands its own cursor back to return the way it came
+    first_id = news_items[0]["_id"] if news_items else cursor
+    last_id = news_items[-1]["_id"] if news_items else cursor
+    if newer:
+        # Coming from an older page, which is still there
+        has_newer, has_older = has_more, True
+    else:
+        has_newer, has_older = cursor_id is not None, has_more
+
+    response = {
+        "message": "Success" if news_items else "No more news items available",
+        "items": news_items,
+        "next_cursor": last_id if has_older else None,
+        "previous_cursor": first_id if has_newer else None
+    }
+    # New articles only change the page at the newest edge
+    news_cache.set(cache_key, response, tags=[] if has_newer else [newest_edge_tag(category)])
+    return response
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Datetimes are stored as naive UTC."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _highlight(value: Any, pattern: re.Pattern, max_chars: int) -> Optional[str]:
+    """
+    Snippet of a text field around its first match, with matches wrapped in <mark>.
+    Lists (e.g. summary bullet points) are searched item by item. None if nothing matches.
+    """
+    if isinstance(value, list):
+        return next((snippet for snippet in (_highlight(item, pattern, max_chars) for item in value) if snippet), None)
+    if not isinstance(value, str):
+        return None
+    match = pattern.search(value)
+    if not match:
+        return None
+    start = max(0, match.start() - max_chars // 3)
+    end = min(len(value), start + max_chars)
+    snippet = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", value[start:end])
+    return f"{'...' if start > 0 else ''}{snippet}{'...' if end < len(value) else ''}"
+
+@router.get("/search")
+async def search_news(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms; \"quoted phrases\" and -excluded terms are supported"),
+    category: Optional[str] = Query(None, description="Category to filter news items"),
+    from_date: Optional[datetime] = Query(None, description="Only articles published at or after this date"),
+    to_date: Optional[datetime] = Query(None, description="Only articles published before this date"),
+    page: int = Query(1, ge=1, description="Page number, starting at 1"),
+    limit: int = Query(Settings.NEWS_PAGE_SIZE, ge=1, le=Settings.NEWS_PAGE_MAX_SIZE, description="Page size"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, the list fields by default")
+):
+    """
+    Search news articles over their title, keywords, summary, description and article text.
+    
+    Args:
+        q: Search terms, matched on word stems; title matches rank highest
+        category: Optional category to filter news items
+        from_date: Optional earliest publication date
+        to_date: Optional publication date to stay before
+        page: Page of the results
+        limit: Number of items per page
+        fields: Fields to return for each item (always with '_id' and 'score')
+    
+    Returns:
+        The items of the page, best matches first, each with its relevance 'score' and
+        'highlights' (snippets of the matching fields), and whether there is a next page
+    """
+    category = canonical_category(category)
+    projection = _parse_fields(fields, Settings.NEWS_LIST_FIELDS, CACHED_EXCLUDED_FIELDS)
+    skip = (page - 1) * limit
+    if skip + limit > Settings.NEWS_SEARCH_MAX_RESULTS:
+        raise HTTPException(status_code=400, detail=f"Only the first {Settings.NEWS_SEARCH_MAX_RESULTS} results can be paged through")
+    from_date, to_date = _utc_naive(from_date), _utc_naive(to_date)
+
+    cache_key = ("search", q, category, from_date, to_date, page, limit, tuple(projection or ()))
+    cached_response = news_cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    query: Dict[str, Any] = {"$text": {"$search": q}}
+    if category:
+        query["category"] = category
+    if from_date or to_date:
+        query["published_at"] = {}
+        if from_date:
+            query["published_at"]["$gte"] = from_date
+        if to_date:
+            query["published_at"]["$lt"] = to_date
+    # Highlighted fields are fetched even when they are not returned
+    requested = set(projection)
+    highlight_fields = SEARCH_HIGHLIGHT_FIELDS
+    if SEARCH_HIGHLIGHT_ARTICLE_FIELD in requested:
+        highlight_fields += (SEARCH_HIGHLIGHT_ARTICLE_FIELD,)
+    projection = {**projection, **{field: 1 for field in highlight_fields}, "score": {"$meta": "textScore"}}
+
+    try:
+        # One extra item tells whether there is a next page
+        news_items = await AsyncMongoClient.search_collection(
             database=MongoConfig.NEWS_DATABASE,
             collection=MongoConfig.NEWS_COLLECTION,
-            query=previous_query,
-            sort=[("_id", 1)],
-            limit=1
+            query=query,
+            projection=projection,
+            sort=[("score", {"$meta": "textScore"}), ("_id", -1)],
+            skip=skip,
+            limit=limit + 1
         )
-        print("Current id: ", news_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching news: {str(e)}")
+
+    has_next = len(news_items) > limit
+    terms = [term for term in SEARCH_TERM_PATTERN.findall(q) if len(term) > 1]
+    # Terms match on their stem, so highlight any word starting with a term
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE) if terms else None
+    items = []
+    for news_item in news_items[:limit]:
+        highlights = {}
+        if pattern is not None:
+            for field in highlight_fields:
+                snippet = _highlight(news_item.get(field), pattern, Settings.NEWS_SEARCH_SNIPPET_CHARS)
+                if snippet:
+                    highlights[field] = snippet
+        item = {key: value for key, value in news_item.items() if key in requested or key in ("_id", "score")}
+        _serialize_ids(item)
+        item["highlights"] = highlights
+        items.append(item)
+
+    response = {
+        "message": "Success" if items else "No matching news items",
+        "items": items,
+        "page": page,
+        "has_next": has_next
+    }
+    # New articles can match any search in their category
+    news_cache.set(cache_key, response, tags=[newest_edge_tag(category)])
+    return response
+
+@router.get("/{news_id}/related")
+async def get_related_news(
+    news_id: str,
+    limit: int = Query(IngestConfig.RELATED_TOP_K, ge=1, le=IngestConfig.RELATED_TOP_K, description="Number of related articles")
+):
+    """
+    Get the articles most similar to a news article, most similar first.
 
-        # The "description" field has <p> tags, so we need to remove them
-        news_item["description"] = (
-            news_item["description"].replace("<p>", "").replace("</p>", "")
-            if news_item["description"] is not None
-            else ""
+    The related articles are computed at ingest time (see related_articles.py), so this
+    is a single lookup by _id. Articles ingested before the last update have none yet.
+    """
+    doc_id = _parse_object_id(news_id, "news_id")
+    try:
+        news_items = await AsyncMongoClient.search_collection(
+            database=MongoConfig.NEWS_DATABASE,
+            collection=MongoConfig.NEWS_COLLECTION,
+            query={"_id": doc_id},
+            projection={RELATED_FIELD: 1},
+            limit=1
         )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching related news: {str(e)}")
+    if not news_items:
+        raise HTTPException(status_code=404, detail=f"News item '{news_id}' not found")
+    related = (news_items[0].get(RELATED_FIELD) or [])[:limit]
+    return {
+        "message": "Success" if related else "No related news items",
+        "id": news_id,
+        "items": related
+    }
 
-        return {
-            "message": "Success",
-            "id": news_id,
-            "data": news_item,
-            "has_next": len(next_items) > 0,
-            "has_previous": len(previous_items) > 0
-        }
-        
+# Keep this route last, it matches any /news/<segment> path
+@router.get("/{news_id}")
+async def get_news_by_id(
+    news_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, all fields by default")
+):
+    """
+    Get a single news article by its ID, e.g. the full body of an item from a list page.
+    """
+    doc_id = _parse_object_id(news_id, "news_id")
+    projection = _parse_fields(fields, None) or FULL_DOCUMENT_PROJECTION
+    try:
+        news_items = await AsyncMongoClient.search_collection(
+            database=MongoConfig.NEWS_DATABASE,
+            collection=MongoConfig.NEWS_COLLECTION,
+            query={"_id": doc_id},
+            projection=projection,
+            limit=1
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching news: {str(e)}")
+    if not news_items:
+        raise HTTPException(status_code=404, detail=f"News item '{news_id}' not found")
+    news_item = _serialize_ids(news_items[0])
+    return {"message": "Success", "id": news_item["_id"], "data": news_item}
@@ -0,0 +1,142 @@
+"""
+Polling scheduler that keeps every news channel up to date.
+
+Each channel is updated on its own adaptive interval: a channel whose last update found
+new items is polled sooner, one that found nothing backs off (see app.polling). Within
+a channel, each RSS feed also has its own interval (see FeedStateStore.schedule_next).
+A channel is never updated twice at the same time, and at most
+SchedulerConfig.MAX_CONCURRENCY channels are updated at once.
+
+Usage:
+    python -m app.scheduler
+"""
+import time
+import signal
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from .config import SchedulerConfig
+from .news_control import NewsController
+from .polling import adapt_interval, jittered
+
+class NewsScheduler:
+    """Updates each channel through NewsController whenever it is due."""
+
+    def __init__(
+        self,
+        channels: Optional[List[str]] = None,
+        max_concurrency: int = SchedulerConfig.MAX_CONCURRENCY
+    ):
+        self.channels = channels or list(NewsController.get_available_channels())
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        # Spread the first updates over the first interval instead of starting them all at once
+        now = time.monotonic()
+        self._state: Dict[str, Dict[str, Any]] = {
+            channel: {
+                "interval": SchedulerConfig.CHANNEL_DEFAULT_INTERVAL,
+                "next_run_at": now + jittered(i * SchedulerConfig.CHANNEL_MIN_INTERVAL / max(len(self.channels), 1)),
+                "running": False,
+                "runs": 0,
+                "failures": 0,
+                "last_new_items": None,
+            }
+            for i, channel in enumerate(self.channels)
+        }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Current interval, time until the next update and run counts of each channel."""
+        now = time.monotonic()
+        return {
+            channel: {
+                "interval": state["interval"],
+                "next_run_in": max(0.0, state["next_run_at"] - now),
+                "running": state["running"],
+                "runs": state["runs"],
+                "failures": state["failures"],
+                "last_new_items": state["last_new_items"],
+            }
+            for channel, state in self._state.items()
+        }
+
+    def stop(self) -> None:
+        """Stop scheduling updates; run_forever returns once the running ones finish."""
+        self._stopping.set()
+        self._wakeup.set()
+
+    async def _update_channel(self, channel: str) -> None:
+        state = self._state[channel]
+        changed = None
+        try:
+            async with self._semaphore:
+                # Runs the channel under its time budget, see NewsController.update_all
+                result = (await NewsController.update_all([channel]))[channel]
+            if result["status"] != "ok":
+                # Back off a failing channel like a dormant one
+                state["failures"] += 1
+                changed = False
+            else:
+                state["last_new_items"] = result["new"]
+                # Keep the interval when the channel had no feed due
+                if result.get("feeds", 1):
+                    changed = result["new"] > 0
+        except Exception as e:
+            print(f"Scheduler: error updating {channel}: {str(e)}")
+            state["failures"] += 1
+            changed = False
+        finally:
+            state["interval"] = adapt_interval(
+                state["interval"],
+                changed,
+                SchedulerConfig.CHANNEL_MIN_INTERVAL,
+                SchedulerConfig.CHANNEL_MAX_INTERVAL,
+                SchedulerConfig.CHANNEL_DEFAULT_INTERVAL
+            )
+            # The interval counts from the end of the update, so slow updates never overlap
+            state["next_run_at"] = time.monotonic() + jittered(state["interval"])
+            state["running"] = False
+            state["runs"] += 1
+            self._wakeup.set()
+
+    async def run_forever(self) -> None:
+        """Update the channels as they become due until stop() is called."""
+        tasks = set()
+        while not self._stopping.is_set():
+            now = time.monotonic()
+            for channel, state in self._state.items():
+                if not state["running"] and state["next_run_at"] <= now:
+                    state["running"] = True
+                    task = asyncio.create_task(self._update_channel(channel))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+            # Sleep until the next channel is due, or until an update finishes or stop() is called
+            idle = [state["next_run_at"] for state in self._state.values() if not state["running"]]
+            timeout = max(0.0, min(idle) - time.monotonic()) if idle else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+if __name__ == "__main__":
+    async def main():
+        await NewsController.startup()
+        scheduler = NewsScheduler()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, scheduler.stop)
+        print(f"Scheduling updates of: {', '.join(scheduler.channels)}")
+        try:
+            await scheduler.run_forever()
+        finally:
+            await NewsController.shutdown()
+
+    asyncio.run(main())
+
+    # To run this file as a script:
+    # python -m app.scheduler
@@ -0,0 +1,102 @@
+"""
+Import-time benchmark for the API and worker entry points.
+
+Each module is imported in a fresh interpreter several times, and the median import
+time is compared with its budget. The benchmark also fails if importing a module pulls
+in one of the lazily loaded modules (channel implementations, the crawler and its
+scraping/LLM stack). MongoDB points to an unroutable address during the benchmark,
+so any import-time connection attempt shows up as a blown budget.
+
+Usage:
+    python benchmark_imports.py [--runs N] [--scale FACTOR]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Median import time allowed for each entry point, in seconds
+BUDGETS = {
+    "app.main": 2.0,
+    "app.news_control": 1.0,
+    "app.scheduler": 1.0,
+    "app.jobs": 1.0,
+}
+
+# Modules that must only be imported once they are used
+LAZY_MODULES = (
+    "scrapegraphai",
+    "numpy",
+    "app.crawler.crawler_utils",
+    "app.crawler.crawl_executor",
+    "app.news_channels.straight_times",
+    "app.news_channels.new_york_times",
+    "app.news_channels.cna",
+    "app.news_channels.news_channel_utils.straight_times_utils",
+    "app.news_channels.news_channel_utils.mongo_news_utils",
+)
+
+PROBE = """
+import sys, json, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+def measure(module: str, runs: int):
+    """Import a module in `runs` fresh interpreters, return the median time and the loaded modules."""
+    env = dict(os.environ)
+    # TEST-NET address: nothing answers, so a connection at import time would hang
+    env["MONGODB_URL"] = "mongodb://192.0.2.1:27017/?serverSelectionTimeoutMS=5000"
+    root = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    modules = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        modules = result["modules"]
+    return statistics.median(times), modules
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh imports per module")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, for slow machines")
+    args = parser.parse_args()
+
+    failures = []
+    for module, budget in BUDGETS.items():
+        budget *= args.scale
+        try:
+            seconds, modules = measure(module, args.runs)
+        except subprocess.CalledProcessError as e:
+            failures.append(f"{module}: import failed\n{e.stderr}")
+            continue
+        eager = [name for name in LAZY_MODULES
+                 if any(loaded == name or loaded.startswith(name + ".") for loaded in modules)]
+        status = "ok" if seconds <= budget and not eager else "FAIL"
+        print(f"{status:>4}  {module:<20} {seconds * 1000:8.1f} ms  (budget {budget * 1000:.0f} ms)")
+        if seconds > budget:
+            failures.append(f"{module}: {seconds:.3f}s exceeds its {budget:.3f}s budget")
+        if eager:
+            failures.append(f"{module}: imports lazy modules eagerly: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"Error: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+    # To run this file as a script:
+    # python benchmark_imports.py
@@ -0,0 +1,23 @@
+"""
+Tests of the ingest-time normalization of news items.
+
+Usage:
+    python -m pytest test_normalization.py
+"""
+from app.normalization import canonical_link
+from app.news_channels.news_channel_utils.dedup import dedup_key
+
+def test_canonical_link_keeps_identifying_parameters():
+    first = {"link": "https://example.com/article.php?id=123"}
+    second = {"link": "https://example.com/article.php?id=456"}
+    assert dedup_key(first) == "https://example.com/article.php?id=123"
+    assert dedup_key(first) != dedup_key(second)
+
+def test_canonical_link_strips_tracking_parameters():
+    assert canonical_link("HTTPS://Example.com/news/story/?utm_source=rss&utm_medium=feed&fbclid=abc#top") \
+        == "https://example.com/news/story"
+    assert canonical_link("https://example.com/?p=456&gclid=xyz") == "https://example.com/?p=456"
+
+def test_canonical_link_sorts_parameters():
+    assert canonical_link("https://example.com/view?page=2&id=7") \
+        == canonical_link("https://example.com/view?id=7&utm_campaign=x&page=2")
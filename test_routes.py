@@ -0,0 +1,106 @@
+"""
+Route tests of the news API, with the news collection replaced by stored-like documents
+(ObjectId and datetime fields as the driver returns them).
+
+Usage:
+    python -m pytest test_routes.py
+"""
+import copy
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.cache import news_cache
+from app.routers import news
+
+CANONICAL_ID = ObjectId()
+STORED_NEWS = {
+    "_id": ObjectId(),
+    "title": "Parliament passes the budget",
+    "category": "World",
+    "pubDate": "Mon, 03 Mar 2025 08:00:00 +0800",
+    "published_at": datetime(2025, 3, 3, 0, 0),
+    "summary": ["The budget was passed."],
+    "duplicate_of": CANONICAL_ID,
+}
+
+@pytest.fixture
+def client(monkeypatch):
+    async def search_collection(database, collection, query, projection=None, skip=0, limit=100, sort=None):
+        return [copy.deepcopy(STORED_NEWS)]
+
+    async def get_category_boundaries(category):
+        return None
+
+    monkeypatch.setattr(news.AsyncMongoClient, "search_collection", search_collection)
+    monkeypatch.setattr(news, "get_category_boundaries", get_category_boundaries)
+    news_cache.clear()
+    # Without the context manager the startup events (MongoDB, HTTP session) do not run
+    return TestClient(app)
+
+def assert_serialized(item):
+    assert item["_id"] == str(STORED_NEWS["_id"])
+    assert item["duplicate_of"] == str(CANONICAL_ID)
+
+def test_get_news_by_id(client):
+    response = client.get(f"/news/{STORED_NEWS['_id']}")
+    assert response.status_code == 200
+    assert response.json()["id"] == str(STORED_NEWS["_id"])
+    assert_serialized(response.json()["data"])
+
+def test_get_news_simple(client):
+    response = client.get("/news/get_news_simple")
+    assert response.status_code == 200
+    assert_serialized(response.json()["data"])
+
+def test_get_news_page(client):
+    response = client.get("/news", params={"fields": "title,duplicate_of"})
+    assert response.status_code == 200
+    assert_serialized(response.json()["items"][0])
+
+def test_search_news(client):
+    response = client.get("/news/search", params={"q": "budget", "fields": "title,duplicate_of"})
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert_serialized(item)
+    assert item["highlights"]["title"] == "Parliament passes the <mark>budget</mark>"
+
+def test_search_fetches_article_only_when_requested(client, monkeypatch):
+    projections = []
+
+    async def search_collection(database, collection, query, projection=None, skip=0, limit=100, sort=None):
+        projections.append(projection)
+        return [copy.deepcopy(STORED_NEWS)]
+
+    monkeypatch.setattr(news.AsyncMongoClient, "search_collection", search_collection)
+    client.get("/news/search", params={"q": "budget"})
+    client.get("/news/search", params={"q": "budget", "fields": "title,article"})
+    assert "article" not in projections[0]
+    assert "article" in projections[1]
+
+def test_cached_routes_reject_related(client):
+    for path in ("/news", "/news/search"):
+        response = client.get(path, params={"q": "budget", "fields": "title,related"})
+        assert response.status_code == 400
+
+def test_routes_reject_internal_fields(client):
+    for path in ("/news", "/news/search", f"/news/{STORED_NEWS['_id']}"):
+        response = client.get(path, params={"q": "budget", "fields": "title,related_terms"})
+        assert response.status_code == 400
+
+def test_empty_page_returns_its_cursor(client, monkeypatch):
+    async def search_collection(database, collection, query, projection=None, skip=0, limit=100, sort=None):
+        return []
+
+    monkeypatch.setattr(news.AsyncMongoClient, "search_collection", search_collection)
+    cursor = str(STORED_NEWS["_id"])
+    response = client.get("/news", params={"cursor": cursor, "direction": "previous"})
+    assert response.json()["items"] == []
+    assert response.json()["next_cursor"] == cursor
+    assert response.json()["previous_cursor"] is None
+    response = client.get("/news", params={"cursor": cursor, "direction": "next"})
+    assert response.json()["next_cursor"] is None
+    assert response.json()["previous_cursor"] == cursor